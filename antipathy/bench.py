@@ -0,0 +1,725 @@
+"""
+rough timings for the hot spots in path.py
+
+run with:  python -m antipathy.bench [name ...]
+"""
+from __future__ import print_function
+
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+from antipathy.path import Path, ThreadPoolExecutor, unicode
+
+benchmarks = []
+
+def benchmark(func):
+    benchmarks.append(func)
+    return func
+
+def report(label, func, number, items=1):
+    "print operations per second of func(), which performs `items` operations"
+    best = min(timeit.repeat(func, number=number, repeat=3))
+    print('    %-40s %12.0f ops/sec' % (label, number * items / best))
+
+sample_paths = [
+        unicode('/srv/data/tenant_%03d/incoming/2020-05-%02d/batch_%d.csv') % (i, i % 28 + 1, i)
+        for i in range(1000)
+        ]
+
+
+@benchmark
+def construction():
+    "Path(...) from a single str"
+    paths = sample_paths
+    def lazy():
+        for s in paths:
+            Path(s)
+    def eager():
+        # what construction cost when every component was split out at once
+        for s in paths:
+            Path(s)._vol
+    def component():
+        for s in paths:
+            Path(s).ext
+    report('construct only (lazy)', lazy, 100, len(paths))
+    report('construct + split (former eager cost)', eager, 100, len(paths))
+    report('construct + .ext', component, 100, len(paths))
+
+
+@benchmark
+def constructors():
+    "Path(...) with the different argument signatures"
+    class PathLike(object):
+        def __init__(self, path):
+            self.path = path
+        def __ospath__(self):
+            return self.path
+    text = sample_paths[0]
+    data = text.encode('ascii')
+    path = Path(text)
+    like = PathLike(text)
+    pieces = text.split('/')
+    signatures = (
+            ('Path()', lambda: Path()),
+            ('Path(str)', lambda: Path(text)),
+            ('Path(bytes)', lambda: Path(data)),
+            ('Path(Path)', lambda: Path(path)),
+            ('Path(path-like)', lambda: Path(like)),
+            ('Path(str, str)', lambda: Path(text, pieces[-1])),
+            ('Path(*%d strs)' % len(pieces), lambda: Path(*pieces)),
+            )
+    for label, func in signatures:
+        report(label, func, 100000)
+
+
+@benchmark
+def components():
+    "reading components from already-created Paths"
+    paths = [Path(s) for s in sample_paths]
+    for p in paths:
+        p.ext
+    def filename():
+        for p in paths:
+            p.filename
+    def filename_ext():
+        for p in paths:
+            p.filename.ext
+    def parent():
+        for p in paths:
+            p.parent
+    def parent_filename():
+        for p in paths:
+            p.parent.filename
+    report('.filename', filename, 100, len(paths))
+    report('.filename.ext', filename_ext, 100, len(paths))
+    report('.parent', parent, 100, len(paths))
+    report('.parent.filename', parent_filename, 100, len(paths))
+
+
+@benchmark
+def interning():
+    "Path(...) and / for a small set of repeated prefixes"
+    prefixes = [unicode('/srv/data/tenant_%03d/incoming/') % (i % 50) for i in range(1000)]
+    def construct():
+        for s in prefixes:
+            Path(s).parent
+    def divide():
+        for s in prefixes:
+            (Path(s) / unicode('day')).parent
+    try:
+        report('Path(prefix).parent, interning off', construct, 100, len(prefixes))
+        report('Path(prefix) / day, interning off', divide, 100, len(prefixes))
+        Path.interned.resize(4096)
+        report('Path(prefix).parent, interning on', construct, 100, len(prefixes))
+        report('Path(prefix) / day, interning on', divide, 100, len(prefixes))
+        print('    %r' % Path.interned)
+    finally:
+        Path.interned.resize(0)
+        Path.interned.clear()
+
+
+@benchmark
+def joins():
+    "chained / joins, e.g. root / tenant / day / name"
+    root = Path(unicode('/srv/data'))
+    for depth in (4, 16, 64, 256):
+        parts = [unicode('part_%d') % i for i in range(depth)]
+        def chained():
+            p = root
+            for part in parts:
+                p = p / part
+            p.filename
+        def reparsed():
+            # every step splitting the whole path again
+            p = root
+            for part in parts:
+                p = Path(p + unicode('/') + part)
+                p._split()
+        number = max(10, 20000 // depth)
+        report('depth %4d, / chain' % depth, chained, number, depth)
+        report('depth %4d, full re-split per step' % depth, reparsed, number, depth)
+
+
+@benchmark
+def joinpath():
+    "building partition paths: chained / vs joinpath()"
+    root = Path(unicode('/srv/data'))
+    partitions = [
+            (unicode('tenant_%03d') % (i % 50), unicode('year=2020'), unicode('month=%02d') % (i % 12 + 1), unicode('part-%05d.parquet') % i)
+            for i in range(1000)
+            ]
+    def chained():
+        for tenant, year, month, name in partitions:
+            (root / tenant / year / month / name).ext
+    def joined():
+        for parts in partitions:
+            root.joinpath(*parts).ext
+    report('root / a / b / c / d', chained, 20, len(partitions))
+    report('root.joinpath(a, b, c, d)', joined, 20, len(partitions))
+
+
+@benchmark
+def elements():
+    "repeated .elements / .dir_elements / iteration on the same Paths"
+    paths = [Path(s) for s in sample_paths]
+    def first():
+        for s in sample_paths:
+            Path(s).elements
+    def elements():
+        for p in paths:
+            p.elements
+    def dir_elements():
+        for p in paths:
+            p.dir_elements
+    def iterate():
+        for p in paths:
+            for e in p.iter_all():
+                pass
+    report('new Path(...).elements', first, 20, len(paths))
+    report('.elements, repeated', elements, 20, len(paths))
+    report('.dir_elements, repeated', dir_elements, 20, len(paths))
+    report('iter_all(), repeated', iterate, 20, len(paths))
+
+
+@benchmark
+def ascend_descend():
+    "ascend() and descend() at increasing depths"
+    for depth in (10, 100, 1000):
+        path = Path(unicode('/') + unicode('/').join([unicode('d%d') % i for i in range(depth)]) + unicode('/lock.pid'))
+        def ascend():
+            for p in Path(path).ascend():
+                pass
+        def descend():
+            for p in Path(path).descend():
+                pass
+        number = max(3, 3000 // depth)
+        report('depth %4d, ascend()' % depth, ascend, number)
+        report('depth %4d, descend()' % depth, descend, number)
+
+
+@benchmark
+def normalize():
+    "* and normpath() on user-supplied relative paths"
+    base = Path(unicode('/srv/data/tenant_001/incoming'))
+    requests = [
+            unicode('../tenant_%03d/./incoming//2020-05-%02d/../batch_%d.csv') % (i, i % 28 + 1, i)
+            for i in range(1000)
+            ]
+    def fuse():
+        for r in requests:
+            base * r
+    absolute = [unicode(base) + unicode('/') + r for r in requests]
+    def normpath():
+        for r in absolute:
+            Path(r).normpath()
+    def normpaths():
+        Path.normpaths(absolute)
+    report('base * request', fuse, 20, len(requests))
+    report('Path(request).normpath()', normpath, 20, len(requests))
+    report('Path.normpaths(list)', normpaths, 20, len(requests))
+
+
+def make_tree(dirs, files):
+    "a scratch directory holding dirs subdirectories of files files each"
+    top = tempfile.mkdtemp(prefix='antipathy_bench_')
+    for d in range(dirs):
+        subdir = os.path.join(top, 'dir_%03d' % d)
+        os.mkdir(subdir)
+        for f in range(files):
+            open(os.path.join(subdir, 'file_%04d.dat' % f), 'w').close()
+    return Path(unicode(top))
+
+@benchmark
+def tree_walk():
+    "walk a tree, asking isfile() and stat() of every file"
+    if not hasattr(os, 'scandir'):
+        print('    os.scandir not available')
+        return
+    top = make_tree(50, 200)
+    count = 50 * 200
+    def walk():
+        for dirpath, dirnames, filenames in top.walk():
+            for name in filenames:
+                path = dirpath / name
+                if path.isfile():
+                    path.stat().st_size
+    def scan():
+        for dirpath, dirnames, filenames in top.scan():
+            for path in filenames:
+                if path.isfile():
+                    path.stat().st_size
+    try:
+        report('walk() + isfile() + stat()', walk, 3, count)
+        report('scan() + isfile() + stat()', scan, 3, count)
+    finally:
+        shutil.rmtree(top)
+
+
+@benchmark
+def big_directory():
+    "listdir() vs iterdir() on one directory of 100000 entries"
+    if not hasattr(os, 'scandir'):
+        print('    os.scandir not available')
+        return
+    top = make_tree(1, 100000) / unicode('dir_000')
+    def first_listdir():
+        top.listdir()[0]
+    def first_iterdir():
+        next(top.iterdir())
+    def all_listdir():
+        for p in top.listdir():
+            pass
+    def all_iterdir():
+        for p in top.iterdir():
+            pass
+    try:
+        report('first entry, listdir()', first_listdir, 3)
+        report('first entry, iterdir()', first_iterdir, 3)
+        report('every entry, listdir()', all_listdir, 3, 100000)
+        report('every entry, iterdir()', all_iterdir, 3, 100000)
+        try:
+            import tracemalloc
+        except ImportError:
+            return
+        for label, func in (('listdir()', all_listdir), ('iterdir()', all_iterdir)):
+            tracemalloc.start()
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print('    %-40s %12.0f KiB peak' % (label, peak / 1024.0))
+    finally:
+        shutil.rmtree(top.dirname)
+
+
+@benchmark
+def globbing():
+    "glob() through literal and wildcard segments, and compiled re-use"
+    if not hasattr(os, 'scandir'):
+        print('    os.scandir not available')
+        return
+    import glob as native
+    from antipathy.path import GlobPattern
+    top = make_tree(50, 200)
+    for d in range(50):
+        os.mkdir(top / unicode('dir_%03d/incoming') % d)
+        for f in range(20):
+            open(top / unicode('dir_%03d/incoming/batch_%02d.csv') % (d, f), 'w').close()
+    wildcard = top / unicode('dir_*/incoming/*.csv')
+    recursive = top / unicode('**/batch_0*.csv')
+    compiled = GlobPattern(unicode('incoming/*.csv'))
+    dirs = [top / unicode('dir_%03d') % d for d in range(50)]
+    try:
+        # what Path.glob used to do
+        def former(pattern, recursive=False):
+            return [Path(p) for p in native.glob(pattern, recursive=recursive)]
+        report('former glob(dir_*/incoming/*.csv)', lambda: former(wildcard), 5)
+        report('Path.glob(dir_*/incoming/*.csv)', lambda: Path.glob(wildcard), 5)
+        report('former glob(**/batch_0*.csv)', lambda: former(recursive, True), 5)
+        report('Path.glob(**/batch_0*.csv)', lambda: Path.glob(recursive), 5)
+        report('former glob(dir/incoming/*.csv) x 50', lambda: [former(d + unicode('/incoming/*.csv')) for d in dirs], 5)
+        report('compiled.glob(dir) x 50', lambda: [compiled.glob(d) for d in dirs], 5)
+    finally:
+        shutil.rmtree(top)
+
+
+@benchmark
+def many_patterns():
+    "a list of 50 patterns against one directory of 20000 files"
+    if not hasattr(os, 'scandir'):
+        print('    os.scandir not available')
+        return
+    top = make_tree(1, 20000) / unicode('dir_000')
+    patterns = [unicode('file_%02d*.dat') % i for i in range(50)]
+    def one_at_a_time():
+        # what the bulk operations used to do with a list
+        return [f for fs in patterns for f in top.glob(fs)]
+    def together():
+        return top._glob_all(patterns)
+    try:
+        report('glob() once per pattern', one_at_a_time, 3)
+        report('all patterns in one pass', together, 3)
+    finally:
+        shutil.rmtree(top.dirname)
+
+
+@benchmark
+def brace_alternation():
+    "one pattern with 8 brace alternatives against a directory of 20000 files"
+    if not hasattr(os, 'scandir'):
+        print('    os.scandir not available')
+        return
+    top = make_tree(1, 20000) / unicode('dir_000')
+    alternatives = [unicode('%d') % i for i in range(8)]
+    def expanded():
+        # what a caller had to do before braces were understood
+        return [f for a in alternatives for f in top.glob(unicode('file_*%s.dat') % a)]
+    def braces():
+        return top.glob(unicode('file_*{%s}.dat') % unicode(',').join(alternatives))
+    try:
+        report('one glob() per alternative', expanded, 3)
+        report('one brace pattern', braces, 3)
+    finally:
+        shutil.rmtree(top.dirname)
+
+
+@benchmark
+def cached_listings():
+    "glob('*.cfg') and listdir() over the same 300 directories of 100 files"
+    if not hasattr(os, 'scandir'):
+        print('    os.scandir not available')
+        return
+    top = make_tree(300, 100)
+    dirs = [top/d for d in top.listdir()]
+    # just-changed directories are not cached
+    for d in dirs:
+        os.utime(d, (0, 0))
+    def lookups():
+        for d in dirs:
+            d.glob(unicode('*.cfg'))
+            d.listdir()
+    try:
+        report('uncached', lookups, 5, 2 * len(dirs))
+        with Path.listings.enabled(1024):
+            report('with Path.listings', lookups, 5, 2 * len(dirs))
+    finally:
+        shutil.rmtree(top)
+
+
+@benchmark
+def cached_stats():
+    "exists(), isdir(), isfile(), and stat() of the same 2000 files"
+    top = make_tree(20, 100)
+    files = [top/d/f for d in top.listdir() for f in (top/d).listdir()]
+    def metadata():
+        for f in files:
+            if f.exists() and not f.isdir() and f.isfile():
+                f.stat()
+    try:
+        report('uncached', metadata, 5, len(files))
+        with Path.stats.enabled(4096, ttl=None):
+            report('with Path.stats', metadata, 5, len(files))
+    finally:
+        shutil.rmtree(top)
+
+
+@benchmark
+def parallel_bulk():
+    "Path.chmod() of 500 files, locally and with 1 ms of added latency per call"
+    top = make_tree(5, 100)
+    files = [top/d/f for d in top.listdir() for f in (top/d).listdir()]
+    local_chmod = os.chmod
+    def slow_chmod(*args, **kwds):
+        # roughly a round trip to a network file system
+        time.sleep(0.001)
+        return local_chmod(*args, **kwds)
+    try:
+        report('local, one at a time', lambda: Path.chmod(0o644, files), 3, len(files))
+        report('local, workers=16', lambda: Path.chmod(0o644, files, workers=16), 3, len(files))
+        os.chmod = slow_chmod
+        report('1 ms latency, one at a time', lambda: Path.chmod(0o644, files), 1, len(files))
+        report('1 ms latency, workers=16', lambda: Path.chmod(0o644, files, workers=16), 1, len(files))
+    finally:
+        os.chmod = local_chmod
+        shutil.rmtree(top)
+
+
+@benchmark
+def parallel_copytree():
+    "copytree() of 10 directories of 100 4 KiB files, locally and with 1 ms of added latency per file"
+    if sys.version_info < (3, 2):
+        print('    concurrent.futures not available')
+        return
+    top = make_tree(10, 100)
+    for d in top.listdir():
+        for f in (top/d).listdir():
+            with open(top/d/f, 'wb') as fh:
+                fh.write(b'x' * 4096)
+    count = 10 * 100
+    scratch = Path(unicode(tempfile.mkdtemp(prefix='antipathy_bench_')))
+    def slow_copy(src, dst):
+        # roughly a round trip to a network file system
+        time.sleep(0.001)
+        return shutil.copy2(src, dst)
+    def timed(label, **kwds):
+        # each run needs a fresh destination, so time them one by one
+        best = None
+        for i in range(3):
+            target = scratch / (unicode('copy_%d') % len(scratch.listdir()))
+            start = time.time()
+            top.copytree(target, **kwds)
+            elapsed = time.time() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print('    %-40s %12.0f ops/sec' % (label, count / best))
+    try:
+        timed('local, shutil.copytree')
+        timed('local, workers=8', workers=8)
+        timed('1 ms latency, shutil.copytree', copy_function=slow_copy)
+        timed('1 ms latency, workers=8', copy_function=slow_copy, workers=8)
+    finally:
+        shutil.rmtree(top)
+        shutil.rmtree(scratch)
+
+
+@benchmark
+def parallel_rmtree():
+    "rmtree() of 20 directories of 250 files, locally and with 0.2 ms of added latency per unlink"
+    if sys.version_info < (3, 2):
+        print('    concurrent.futures not available')
+        return
+    count = 20 * 250
+    local_unlink = os.unlink
+    def slow_unlink(*args, **kwds):
+        # roughly a round trip to a network file system
+        time.sleep(0.0002)
+        return local_unlink(*args, **kwds)
+    def timed(label, **kwds):
+        # each run needs a fresh tree, so time them one by one
+        best = None
+        for i in range(3):
+            top = make_tree(20, 250)
+            start = time.time()
+            top.rmtree(**kwds)
+            elapsed = time.time() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print('    %-40s %12.0f ops/sec' % (label, count / best))
+    try:
+        timed('local, shutil.rmtree')
+        timed('local, workers=8', workers=8)
+        os.unlink = slow_unlink
+        timed('0.2 ms latency, shutil.rmtree')
+        timed('0.2 ms latency, workers=8', workers=8)
+    finally:
+        os.unlink = local_unlink
+
+
+@benchmark
+def deferred_rmtree():
+    "time for rmtree() of 5 directories of 1000 files to return, with and without defer"
+    trash = Path(unicode(tempfile.mkdtemp(prefix='antipathy_bench_'))) / unicode('trash')
+    Path.trash.use(trash)
+    def timed(label, **kwds):
+        # each run needs a fresh tree, so time them one by one
+        best = None
+        for i in range(3):
+            top = make_tree(5, 1000)
+            start = time.time()
+            top.rmtree(**kwds)
+            elapsed = time.time() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print('    %-40s %12.3f ms' % (label, best * 1000))
+    try:
+        timed('rmtree()')
+        timed('rmtree(defer=True)', defer=True)
+        start = time.time()
+        Path.trash.wait()
+        print('    %-40s %12.3f ms' % ('Path.trash.wait() afterwards', (time.time() - start) * 1000))
+        print('    %r' % (Path.trash, ))
+    finally:
+        shutil.rmtree(trash.dirname)
+
+
+@benchmark
+def batch_makedirs():
+    "makedirs() of 2000 day/hour partition directories five levels down"
+    count = 2000
+    def targets(top):
+        return [
+                os.path.join(top, 'data', 'events', '%04d' % (d // 24), '%02d' % (d % 24), 'part')
+                for d in range(count)
+                ]
+    def timed(label, make, again=False):
+        # each run needs a fresh tree, so time them one by one
+        best = None
+        for i in range(3):
+            top = tempfile.mkdtemp(prefix='antipathy_bench_')
+            names = targets(top)
+            if again:
+                make(names)
+            start = time.time()
+            make(names)
+            elapsed = time.time() - start
+            best = elapsed if best is None else min(best, elapsed)
+            shutil.rmtree(top)
+        print('    %-40s %12.0f ops/sec' % (label, count / best))
+    def one_at_a_time(names):
+        for name in names:
+            Path.makedirs(name)
+    def with_os(names):
+        for name in names:
+            if not os.path.isdir(name):
+                os.makedirs(name)
+    known = set()
+    timed('os.makedirs()', with_os)
+    timed('Path.makedirs(), one at a time', one_at_a_time)
+    timed('Path.makedirs(list)', Path.makedirs)
+    timed('os.makedirs(), all existing', with_os, again=True)
+    timed('Path.makedirs(list), all existing', Path.makedirs, again=True)
+    timed('Path.makedirs(list, known), existing', lambda names: Path.makedirs(names, known=known), again=True)
+
+
+@benchmark
+def bulk_move():
+    "Path.move() of 1000 files into a directory, on the same device and (from /dev/shm) across devices"
+    count = 1000
+    def timed(label, source_dir, **kwds):
+        # each run needs fresh sources, so time them one by one
+        best = None
+        for i in range(3):
+            top = make_tree(1, count)
+            src = Path(unicode(tempfile.mkdtemp(prefix='antipathy_bench_', dir=source_dir)))
+            for f in (top/'dir_000').listdir():
+                with open(src/f, 'wb') as fh:
+                    fh.write(b'x' * 4096)
+            files = [src/f for f in src.listdir()]
+            dst = top/'dir_000'/'moved'
+            os.mkdir(dst)
+            start = time.time()
+            Path.move(files, dst, **kwds)
+            elapsed = time.time() - start
+            best = elapsed if best is None else min(best, elapsed)
+            shutil.rmtree(top)
+            shutil.rmtree(src)
+        print('    %-40s %12.0f ops/sec' % (label, count / best))
+    timed('same device, one at a time', None)
+    timed('same device, workers=8', None, workers=8)
+    elsewhere = '/dev/shm'
+    if not os.path.isdir(elsewhere) or os.stat(elsewhere).st_dev == os.stat(tempfile.gettempdir()).st_dev:
+        print('    no second device to move from')
+        return
+    timed('across devices, one at a time', elsewhere)
+    timed('across devices, workers=8', elsewhere, workers=8)
+    local_unlink = os.unlink
+    def slow_unlink(*args, **kwds):
+        # roughly a round trip to a network file system
+        time.sleep(0.001)
+        return local_unlink(*args, **kwds)
+    os.unlink = slow_unlink
+    try:
+        timed('1 ms latency, one at a time', elsewhere)
+        timed('1 ms latency, workers=8', elsewhere, workers=8)
+    finally:
+        os.unlink = local_unlink
+
+
+@benchmark
+def marker_touch():
+    "Path.touch() of 5000 marker files, new and then existing"
+    count = 5000
+    def timed(label, touch):
+        # the first run makes the files, the rest touch them again
+        top = Path(unicode(tempfile.mkdtemp(prefix='antipathy_bench_')))
+        names = [top/(unicode('marker_%05d') % i) for i in range(count)]
+        try:
+            start = time.time()
+            touch(names)
+            new = time.time() - start
+            best = None
+            for i in range(3):
+                start = time.time()
+                touch(names)
+                elapsed = time.time() - start
+                best = elapsed if best is None else min(best, elapsed)
+        finally:
+            shutil.rmtree(top)
+        print('    %-40s %12.0f new/sec %12.0f existing/sec' % (label, count / new, count / best))
+    timed('Path.touch(names)', Path.touch)
+    timed('Path.touch(names, literal=True)', lambda names: Path.touch(names, literal=True))
+    if ThreadPoolExecutor is not None:
+        timed('literal=True, workers=4', lambda names: Path.touch(names, literal=True, workers=4))
+
+
+@benchmark
+def copy_engine():
+    "copy() of 50 1 MiB files into an empty directory"
+    top = make_tree(1, 50) / unicode('dir_000')
+    files = [top/f for f in top.listdir()]
+    data = os.urandom(1 << 20)
+    for f in files:
+        with open(f, 'wb') as fh:
+            fh.write(data)
+    def with_shutil(target):
+        for f in files:
+            shutil.copy2(f, target)
+    def with_copier(target):
+        Path.copy(files, target)
+    # alternate the two, and remove each copy outside the timing: copies
+    # piling up (or being overwritten) skew whichever runs later
+    times = {with_shutil: [], with_copier: []}
+    before = dict(Path.copier.counts)
+    try:
+        for i in range(9):
+            for func in (with_shutil, with_copier):
+                target = tempfile.mkdtemp(prefix='antipathy_bench_')
+                start = time.time()
+                func(target)
+                times[func].append(time.time() - start)
+                shutil.rmtree(target)
+    finally:
+        shutil.rmtree(top.dirname)
+    for label, func in (('shutil.copy2', with_shutil), ('Path.copy', with_copier)):
+        median = sorted(times[func])[len(times[func]) // 2]
+        print('    %-40s %12.0f ops/sec (median)' % (label, len(files) / median))
+    used = [m for m in Path.copier.methods if Path.copier.counts[m] != before[m]]
+    print('    %-40s %s' % ('Path.copy used', ', '.join(used)))
+
+
+def allocated(make, count):
+    "bytes allocated per object by make(i), averaged over count objects"
+    try:
+        import tracemalloc
+    except ImportError:
+        return None
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    objects = [make(i) for i in range(count)]
+    end = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # don't count the list holding them
+    return (end - start - sys.getsizeof(objects)) / float(count)
+
+@benchmark
+def memory():
+    "bytes per object, as seen by tracemalloc"
+    try:
+        from pathlib import PurePosixPath
+    except ImportError:
+        PurePosixPath = None
+    template = sample_paths[0][:-4] + unicode('_%07d.csv')
+    def parsed(i):
+        p = Path(template % i)
+        p.ext
+        return p
+    rows = [
+            ('str', lambda i: template % i),
+            ('Path', lambda i: Path(template % i)),
+            ('Path, components read', parsed),
+            ]
+    if PurePosixPath is not None:
+        rows.append(('pathlib.PurePosixPath', lambda i: PurePosixPath(template % i)))
+        def pure_parsed(i):
+            p = PurePosixPath(template % i)
+            p.suffix
+            return p
+        rows.append(('pathlib.PurePosixPath, components read', pure_parsed))
+    for label, make in rows:
+        size = allocated(make, 100000)
+        if size is None:
+            print('    tracemalloc not available')
+            return
+        print('    %-40s %12.1f bytes' % (label, size))
+
+
+def main(names):
+    for func in benchmarks:
+        if names and func.__name__ not in names:
+            continue
+        print('%s: %s' % (func.__name__, func.__doc__))
+        func()
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -4,13 +4,31 @@ file path manipulation
 Copyright: 2011-2019 Ethan Furman
 """
 
+from collections import OrderedDict, deque
+from contextlib import contextmanager
 from os import F_OK, R_OK, W_OK, X_OK
+import errno as _errno
+import fnmatch as _fnmatch
 import glob as _glob
 import os as _os
+import re as _re
 import shutil as _shutil
+import stat as _stat
 import sys as _sys
+import threading as _threading
+import time as _time
 
-__all__ = ['Path', 'F_OK', 'R_OK', 'W_OK', 'X_OK', 'ospath']
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    ThreadPoolExecutor = None
+
+try:
+    import fcntl as _fcntl
+except ImportError:
+    _fcntl = None
+
+__all__ = ['Path', 'GlobPattern', 'BulkResult', 'F_OK', 'R_OK', 'W_OK', 'X_OK', 'ospath']
 
 _py_ver = _sys.version_info[:2]
 
@@ -27,6 +45,13 @@ NoneType = type(None)
 native_glob = _glob.glob
 native_listdir = _os.listdir
 
+# iterdir(kind=...) shorthands, as tests on an os.DirEntry
+_entry_kinds = {
+        'dir': lambda entry: entry.is_dir(),
+        'file': lambda entry: entry.is_file(),
+        'link': lambda entry: entry.is_symlink(),
+        }
+
 system_sep = _os.path.sep
 system_alt = _os.path.altsep or system_sep
 system_ext = _os.path.extsep
@@ -42,7 +67,17 @@ class Path(object):
     ext   = .ext
     """
 
+    __slots__ = ()
+
     def __new__(cls, *paths):
+        if len(paths) == 1:
+            # fast path for the common Path('some/str')
+            path = paths[0]
+            path_type = type(path)
+            if path_type is unicode:
+                return Methods.__new__(uPath, path)
+            elif path_type is bytes:
+                return Methods.__new__(bPath, path)
         paths = tuple([ospath(p) for p in paths])
         if not paths:
             paths = (unicode(), )
@@ -82,13 +117,31 @@ class Path(object):
     def glob(pattern=None):
         if pattern is None:
             pattern = uPath._STAR
-        return [Path(p) for p in native_glob(pattern)]
+        if not hasattr(_os, 'scandir'):
+            return _native_glob(pattern)
+        return GlobPattern(pattern).glob()
+
+    if hasattr(_os, 'scandir'):
+
+        @staticmethod
+        def iglob(pattern=None):
+            if pattern is None:
+                pattern = uPath._STAR
+            return GlobPattern(pattern).iglob()
+
+    if hasattr(_os, 'scandir'):
+
+        @staticmethod
+        def iterdir(dir=None, kind=None):
+            if dir is None:
+                dir = uPath()
+            return Path(dir).iterdir(kind=kind)
 
     @staticmethod
     def listdir(dir=None):
         if dir is None:
             dir = uPath._DOT
-        return [Path(p) for p in _os.listdir(dir)]
+        return _listdir(dir)
 
     @staticmethod
     def abspath(name):
@@ -119,16 +172,22 @@ class Path(object):
                 Path(file).chflags(flags)
 
     @classmethod
-    def chmod(cls, mode, files):
-        "thin wrapper around os.chmod"
-        for file in cls._ensure(files):
-            Path(file).chmod(mode)
+    def chmod(cls, mode, files, workers=None, executor=None):
+        "thin wrapper around os.chmod (see _bulk() for workers and executor)"
+        if workers is executor is None:
+            for file in cls._ensure(files):
+                Path(file).chmod(mode)
+        else:
+            return cls._bulk('chmod', lambda file: Path(file).chmod(mode), cls._ensure(files), workers, executor)
 
     @classmethod
-    def chown(cls, uid, gid, files):
-        "thin wrapper around os.chown"
-        for file in cls._ensure(files):
-            Path(file).chown(uid, gid)
+    def chown(cls, uid, gid, files, workers=None, executor=None):
+        "thin wrapper around os.chown (see _bulk() for workers and executor)"
+        if workers is executor is None:
+            for file in cls._ensure(files):
+                Path(file).chown(uid, gid)
+        else:
+            return cls._bulk('chown', lambda file: Path(file).chown(uid, gid), cls._ensure(files), workers, executor)
 
     if not _is_win:
         @staticmethod
@@ -177,8 +236,8 @@ class Path(object):
             Path(file).copy(dst)
 
     @staticmethod
-    def copytree(src, dst):
-        Path(src).copytree(dst)
+    def copytree(src, dst, *args, **kwds):
+        return Path(src).copytree(dst, *args, **kwds)
 
     @staticmethod
     def descend(name):
@@ -208,14 +267,20 @@ class Path(object):
 
     @staticmethod
     def isdir(name):
+        if Path.stats.size:
+            return _stat.S_ISDIR(_cached_mode(name) or 0)
         return _os.path.isdir(name)
 
     @staticmethod
     def isfile(name):
+        if Path.stats.size:
+            return _stat.S_ISREG(_cached_mode(name) or 0)
         return _os.path.isfile(name)
 
     @staticmethod
     def islink(name):
+        if Path.stats.size:
+            return _stat.S_ISLNK(_cached_mode(name, False) or 0)
         return _os.path.islink(name)
 
     @staticmethod
@@ -230,6 +295,10 @@ class Path(object):
     def iter_dirs(name):
         return Path(name).iter_dirs(name)
 
+    @staticmethod
+    def joinpath(name, *others):
+        return Path(name).joinpath(*others)
+
     if hasattr(_os, 'lchmod'):
 
         @classmethod
@@ -278,14 +347,33 @@ class Path(object):
         return Path(subdir).mkdir(mode=mode, owner=owner)
 
     @staticmethod
-    def makedirs(subdir, mode=None, owner=None):
-        return Path(subdir).makedirs(mode=mode, owner=owner)
+    def makedirs(subdirs, mode=None, owner=None, known=None):
+        """
+        subdirs may be a single directory or many; given many, every
+        directory they share is made (or found to exist) only once, and the
+        ones made are returned
+
+        known is an optional set of directories already known to exist; it
+        is trusted instead of the file system and added to as directories
+        are found or made, so it can be passed to the next call (anything
+        removed since should be discarded from it); a single directory
+        given with known is made as a batch of one
+        """
+        if isinstance(subdirs, Path.base_types):
+            if known is None:
+                return Path(subdirs).makedirs(mode=mode, owner=owner)
+            subdirs = [subdirs]
+        subdirs = [Path(s) for s in subdirs]
+        return [Path(d) for d in _makedirs_batch([s.data_type(s) for s in subdirs], mode, owner, known)]
 
     @classmethod
-    def move(cls, sources, dst):
+    def move(cls, sources, dst, workers=None, executor=None):
+        "see _move_bulk() for workers and executor"
         dst = Path(dst)
         if not dst:
             raise ValueError('invalid dst: <%s>' % (dst, ))
+        if workers is not None or executor is not None:
+            return _move_bulk(cls._ensure(sources), dst, workers, executor)
         for source in cls._ensure(sources):
             Path(source).move(dst)
         return dst
@@ -294,6 +382,27 @@ class Path(object):
     def normcase(path):
         return Path(_os.path.normcase(path))
 
+    @staticmethod
+    def normpath(name):
+        return Path(name).normpath()
+
+    @staticmethod
+    def normpaths(names):
+        "normpath() of every name in names, as a list"
+        paths = []
+        append = paths.append
+        for name in names:
+            # plain strings are normalized without creating a Path for them first
+            if type(name) is unicode:
+                cls = uPath
+            elif type(name) is bytes:
+                cls = bPath
+            else:
+                name = Path(name)
+                cls = name.__class__
+            append(cls._from_offsets(cls._normpath(name, cls._parse(name))))
+        return paths
+
     @staticmethod
     def open(name, mode='r', buffering=None, encoding=None):
         "encoding is only supported on Python3+"
@@ -342,14 +451,20 @@ class Path(object):
             Path(subdir).rmdir()
 
     @classmethod
-    def rmtree(cls, subdirs, ignore_errors=None, onerror=None):
+    def rmtree(cls, subdirs, ignore_errors=None, onerror=None, workers=None, executor=None, defer=False):
         for subdir in cls._ensure(subdirs):
-            Path(subdir).rmtree(ignore_errors=ignore_errors, onerror=onerror)
+            Path(subdir).rmtree(ignore_errors=ignore_errors, onerror=onerror, workers=workers, executor=executor, defer=defer)
 
     @staticmethod
     def samefile(path1, path2):
         return _os.path.samefile(path1, path2)
 
+    if hasattr(_os, 'scandir'):
+
+        @staticmethod
+        def scan(subdir, topdown=True, onerror=None, followlinks=False):
+            return Path(subdir).scan(topdown, onerror, followlinks)
+
     @staticmethod
     def stat(name):
         return Path(name).stat()
@@ -365,19 +480,54 @@ class Path(object):
         return Path(source).symlink(link_name)
 
     @classmethod
-    def touch(cls, names, times=None, no_create=False, reference=None):
-        for name in cls._ensure(names, no_glob_okay=True):
-            Path(name).touch(None, times, no_create, reference)
+    def touch(cls, names, times=None, no_create=False, reference=None, workers=None, executor=None, literal=False):
+        """
+        see _bulk() for workers and executor
+
+        with literal, names are used as they are -- no pattern matching and
+        no existence checks -- and a time left as None in times is kept from
+        each file's own
+        """
+        if literal:
+            if isinstance(names, cls.base_types):
+                names = [names]
+            if reference is not None:
+                ref_stat = Path(reference).stat()
+                times = tuple(
+                        r if t is None else t
+                        for r, t in zip((ref_stat.st_atime, ref_stat.st_mtime), times or (None, None))
+                        )
+            touch = lambda name: _touch(name, times, no_create)
+            if workers is executor is None:
+                for name in names:
+                    touch(name)
+                return
+            return cls._bulk('touch', touch, names, workers, executor)
+        names = cls._ensure(names, no_glob_okay=True)
+        if workers is executor is None:
+            for name in names:
+                Path(name).touch(None, times, no_create, reference)
+        else:
+            touch = lambda name: Path(name).touch(None, times, no_create, reference)
+            return cls._bulk('touch', touch, names, workers, executor)
 
     @classmethod
-    def unlink(cls, names):
-        for name in cls._ensure(names):
-            Path(name).unlink()
+    def unlink(cls, names, workers=None, executor=None, defer=False):
+        "see _bulk() for workers and executor, and Path.trash for defer"
+        if workers is executor is None:
+            for name in cls._ensure(names):
+                Path(name).unlink(defer=defer)
+        else:
+            return cls._bulk('unlink', lambda name: Path(name).unlink(defer=defer), cls._ensure(names), workers, executor)
 
     @classmethod
-    def utime(cls, names, times):
-        for name in cls._ensure(names):
-            Path(name).utime(times)
+    def utime(cls, names, times, workers=None, executor=None):
+        "see _bulk() for workers and executor"
+        if workers is executor is None:
+            for name in cls._ensure(names):
+                Path(name).utime(times)
+        else:
+            return cls._bulk('utime', lambda name: Path(name).utime(times), cls._ensure(names), workers, executor)
 
     if _py_ver >= (2, 6):
 
@@ -406,107 +556,246 @@ class Path(object):
         o_entries = entries
         if isinstance(entries, cls.base_types):
             entries = Path.glob(entries)
+        else:
+            # expand the patterns in the list with one pass over their
+            # directories; any that match nothing are kept as they are
+            entries = Path()._glob_all(entries, keep_unmatched=True)
         if not entries and no_glob_okay:
             entries = o_entries
+            if isinstance(entries, cls.base_types):
+                entries = [entries]
         if not entries:
             raise OSError(2, "No such file or directory: '%s'" % (o_entries, ))
         return entries
+
+    @staticmethod
+    def _bulk(operation, func, files, workers=None, executor=None):
+        """
+        call func(file) for every file, workers at a time (or on executor,
+        a concurrent.futures.Executor), and return a BulkResult; an
+        OSError or IOError is recorded against its file instead of stopping
+        the rest
+
+        without concurrent.futures the files are done one at a time
+        """
+        if workers is not None and workers < 1:
+            raise ValueError('workers must be 1 or more, not %r' % (workers, ))
+        result = BulkResult(operation)
+        def attempt(file):
+            try:
+                func(file)
+            except EnvironmentError:
+                return _sys.exc_info()[1]
+        start = _time.time()
+        if executor is None and (ThreadPoolExecutor is None or workers == 1):
+            outcomes = [attempt(file) for file in files]
+        elif executor is None:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                outcomes = [f.result() for f in [pool.submit(attempt, file) for file in files]]
+        else:
+            outcomes = [f.result() for f in [executor.submit(attempt, file) for file in files]]
+        for file, error in zip(files, outcomes):
+            if error is None:
+                result.succeeded.append(Path(file))
+            else:
+                result.failed.append((Path(file), error))
+        result.elapsed = _time.time() - start
+        return result
 Path.base_types = bytes, str, unicode
 
 
 class Methods(object):
 
+    __slots__ = ()
+
     def __new__(cls, *paths):
+        # a single path is stored as-is and only split into its components
+        # when one of them is asked for; multiple paths have to be split in
+        # order to be joined, so keep the boundaries we already have
         slash = cls._SLASH
-        as_is_value = False
         if not paths:
             paths = (cls._EMPTY, )
-        elif len(paths) == 1:
-            if isinstance(paths[0], Path):
-                paths = (paths[0]._value_, )
-            as_is_value = paths[0]
-        elif len(paths) > 1:
-            # convert sys_sep to '/' (no-op unless on windows)
-            paths = tuple([
-                (p._value_ if isinstance(p, Path) else p)
-                    .replace(cls._SYS_SEP, slash)
-                for p in paths
-                ])
-            new_paths = []
-            abs_path = False
-            if paths[0].startswith(slash):
+        if len(paths) == 1:
+            value = paths[0]
+            if _interned.size:
+                return _interned.lookup(cls, value)
+            p = cls.data_type.__new__(cls, value)
+            if value[:2] == slash+slash:
+                # share points are validated at creation
+                p._split()
+            return p
+        # convert sys_sep to '/' (no-op unless on windows)
+        replace = cls.data_type.replace
+        paths = tuple([replace(p, cls._SYS_SEP, slash) for p in paths])
+        new_paths = []
+        abs_path = False
+        if paths[0].startswith(slash):
+            abs_path = True
+        for first, second in zip(paths[:-1], paths[1:]):
+            if second.startswith(slash):
+                new_paths[:] = []
                 abs_path = True
-            for first, second in zip(paths[:-1], paths[1:]):
-                if second.startswith(slash):
-                    new_paths[:] = []
-                    abs_path = True
-                    continue
-                new_paths.append(first.rstrip('/'))
-            new_paths.append(second)
-            if abs_path:
-                if new_paths[0] == slash:
-                    new_paths[0] == cls._EMPTY
-                elif new_paths[0] != cls._EMPTY:
-                    new_paths.insert(0, cls._EMPTY)
-            paths = tuple(new_paths)
-        string = slash.join(paths)
-        pieces = string.split(slash)
-        vol = dirs = filename = base = ext = cls._EMPTY
+                continue
+            new_paths.append(first.rstrip('/'))
+        new_paths.append(second)
+        if abs_path:
+            if new_paths[0] == slash:
+                new_paths[0] == cls._EMPTY
+            elif new_paths[0] != cls._EMPTY:
+                new_paths.insert(0, cls._EMPTY)
+        joined = cls.data_type.__new__(cls, slash.join(new_paths))
+        vol, dirs, filename = joined._vol, joined._dirs, joined._filename
+        vol_end, dirs_end, name_start, ext_start = joined._split()
+        df_sep = cls._EMPTY
+        if dirs and dirs != slash:
+            df_sep = slash
+        value = vol + dirs + df_sep + filename
+        p = cls.data_type.__new__(cls, value)
+        dirs_end = len(vol) + len(dirs)
+        p._offsets_ = (
+                vol_end,
+                dirs_end,
+                dirs_end + len(df_sep),
+                len(value) - (len(joined) - ext_start),
+                )
+        return p
+
+    @classmethod
+    def _parse(cls, string):
+        """
+        return (vol_end, dirs_end, name_start, ext_start) of string
+
+        vol = string[:vol_end]
+        dirs = string[vol_end:dirs_end]  (with any '//' runs squeezed out)
+        filename = string[name_start:]
+        base = string[name_start:ext_start]
+        ext = string[ext_start:]
+        """
+        slash = cls._SLASH
+        find = cls.data_type.find
+        rfind = cls.data_type.rfind
+        length = len(string)
+        vol_end = 0
         # separate out the ...
         if string[:2] == slash+slash and string[2:3] != slash:          # usually '//'
             # ... share point
-            if len(pieces) < 4:
+            node_end = find(string, slash, 2)
+            if node_end == -1:
                 raise ValueError('bad path: %r' % string)
-            vol = slash.join(pieces[:4])
-            pieces = pieces[4:]
-            if pieces:
-                pieces.insert(0, cls._EMPTY)
+            vol_end = find(string, slash, node_end+1)
+            if vol_end == -1:
+                vol_end = length
         elif string[1:2] == cls._COLON and _is_win:
             # ... drive
-            vol = pieces.pop(0)
-        if len(pieces) > 2:
-            # remove any internal empty components
-            pieces = pieces[:1] + [p for p in pieces[1:-1] if p] + pieces[-1:]
-        if pieces:
-            # separate directory from file name
-            if pieces[-1] in (cls._CUR_DIR, cls._PREV_DIR):
-                pass
-            else:
-                filename = pieces.pop()
-            if pieces == [cls._EMPTY]:
+            vol_end = find(string, slash)
+            if vol_end == -1:
+                vol_end = length
+        last_sep = rfind(string, slash, vol_end)
+        if last_sep == -1:
+            last = string[vol_end:]
+        else:
+            last = string[last_sep+1:]
+        if last in (cls._CUR_DIR, cls._PREV_DIR):
+            # no file name, dirs is everything
+            return vol_end, length, length, length
+        if last_sep == -1:
+            dirs_end = vol_end
+            name_start = vol_end
+        else:
+            name_start = last_sep + 1
+            # back up over any repeated slashes
+            dirs_end = last_sep
+            while dirs_end > vol_end and string[dirs_end-1:dirs_end] == slash:
+                dirs_end -= 1
+            if dirs_end == vol_end:
                 # make sure we have our initial slash
-                pieces = [slash]
-            dirs = slash.join(pieces)
-            if filename:
-                ext_start = filename.rfind(cls._DOT)
-                if ext_start != -1:
-                    base, ext = filename[:ext_start], filename[ext_start:]
-                else:
-                    base = filename
-        df_sep = cls._EMPTY
-        if dirs and dirs != slash:
-            df_sep = slash
-        value = as_is_value or (vol + dirs + df_sep + filename)
+                dirs_end += 1
+        ext_start = length
+        if last:
+            ext_start = rfind(string, cls._DOT, name_start)
+            if ext_start == -1:
+                ext_start = length
+        return vol_end, dirs_end, name_start, ext_start
+
+    def _split(self):
+        """
+        return (vol_end, dirs_end, name_start, ext_start), parsing on first use
+        """
+        try:
+            return self._offsets_
+        except AttributeError:
+            offsets = self._offsets_ = self._parse(self)
+            return offsets
+
+    @property
+    def _vol(self):
+        return self[:self._split()[0]]
+
+    @property
+    def _dirs(self):
+        vol_end, dirs_end = self._split()[:2]
+        dirs = self[vol_end:dirs_end]
+        slash = self._SLASH
+        if slash+slash in dirs:
+            # remove any internal empty components
+            pieces = dirs.split(slash)
+            dirs = slash.join(pieces[:1] + [p for p in pieces[1:] if p])
+        return dirs
+
+    @property
+    def _dirname(self):
+        vol_end, dirs_end = self._split()[:2]
+        if self._SLASH*2 in self[vol_end:dirs_end]:
+            return self[:vol_end] + self._dirs
+        return self[:dirs_end]
+
+    @property
+    def _filename(self):
+        return self[self._split()[2]:]
+
+    @property
+    def _base(self):
+        vol_end, dirs_end, name_start, ext_start = self._split()
+        return self[name_start:ext_start]
+
+    @property
+    def _ext(self):
+        return self[self._split()[3]:]
+
+    @classmethod
+    def _from_offsets(cls, value, offsets=None):
+        """
+        create a Path from a value whose component offsets are already
+        known (or from a value known to be well-formed, if offsets is None)
+        """
         p = cls.data_type.__new__(cls, value)
-        p._value_ = value
-        p._vol = vol
-        p._dirs = dirs
-        p._dirname = vol + dirs
-        p._filename = filename
-        p._base = base
-        p._ext = ext
+        if offsets is not None:
+            p._offsets_ = offsets
+        return p
+
+    @classmethod
+    def _from_entry(cls, prefix, entry):
+        """
+        create a Path for the os.DirEntry entry, found in the directory
+        prefix (which ends with a slash), and keep entry for later queries
+        """
+        p = cls.data_type.__new__(cls, prefix + entry.name)
+        p._entry_ = entry
         return p
 
     @property
     def vol(self):
         'volume/drive of path'
-        return self.__class__(self._vol)
+        vol_end = self._split()[0]
+        return self._from_offsets(self[:vol_end], (vol_end, vol_end, vol_end, vol_end))
     drive = vol
 
     @property
     def root(self):
-        if self._dirs[:1] == self._SLASH or self._vol[:1] == self._SLASH:
-            return self._SLASH
+        slash = self._SLASH
+        vol_end = self._split()[0]
+        if self[:1] == slash or self[vol_end:vol_end+1] == slash:
+            return slash
         else:
             return self._EMPTY
 
@@ -518,13 +807,12 @@ class Methods(object):
     @property
     def dirs(self):
         'directories without volume/drive'
-        result = self.__class__(self._dirs)
-        return result
+        return self._from_offsets(self._dirs)
 
     @property
     def parent(self):
         'first half of os.path.split(...)'
-        return self.__class__(self._dirname)
+        return self._from_offsets(self._dirname)
     dirname = parent
 
     @property
@@ -535,42 +823,185 @@ class Methods(object):
     @property
     def filename(self):
         'second half of os.path.split(...)'
-        return self.__class__(self._filename)
+        vol_end, dirs_end, name_start, ext_start = self._split()
+        filename = self[name_start:]
+        if _is_win and filename[1:2] == self._COLON:
+            # would look like a drive on its own
+            return self.__class__(filename)
+        return self._from_offsets(filename, (0, 0, 0, ext_start - name_start))
     name = basename = filename
 
     @property
     def base(self):
-        return self.__class__(self._base)
+        return self._from_offsets(self._base)
     stem = base
 
     @property
     def ext(self):
-        return self.__class__(self._ext)
+        ext = self._ext
+        if ext == self._DOT:
+            # '.' on its own is the current directory
+            return self._from_offsets(ext)
+        return self._from_offsets(ext, (0, 0, 0, 0))
     suffix = ext
 
     @property
     def suffixes(self):
-        return [self.__class__(e) for e in self._filename.split('.')[1:]]
+        return [
+                self._from_offsets(e, (0, 0, 0, len(e)))
+                for e in self._filename.split(self._DOT)[1:]
+                ]
 
     @property
     def elements(self):
-        return list(self.iter_all())
+        return list(self._elements())
     parts = elements
 
     @property
     def dir_elements(self):
-        return list(self.iter_dirs())
+        return list(self._dir_elements())
+
+    @classmethod
+    def _from_name(cls, name):
+        "a Path for a single component (no slashes) of another Path"
+        if name in (cls._CUR_DIR, cls._PREV_DIR) or _is_win and name[1:2] == cls._COLON:
+            return cls._from_offsets(name)
+        ext_start = name.rfind(cls._DOT)
+        if ext_start == -1:
+            ext_start = len(name)
+        return cls._from_offsets(name, (0, 0, 0, ext_start))
+
+    def _elements(self):
+        '''
+        return (vol, [/], dir, ..., filename) as a tuple, built on first use
+        '''
+        try:
+            return self._elements_
+        except AttributeError:
+            pass
+        slash = self._SLASH
+        result = []
+        vol_end, dirs_end, name_start, ext_start = self._split()
+        if vol_end:
+            result.append(self.vol)
+        dirs = self._dirs
+        if dirs[:1] == slash:
+            result.append(self._from_offsets(slash, (0, 1, 1, 1)))
+        dirs = dirs.strip(slash)
+        if dirs:
+            result.extend([self._from_name(d) for d in dirs.split(slash)])
+        if name_start < len(self):
+            result.append(self.filename)
+        elements = self._elements_ = tuple(result)
+        return elements
+
+    def _prefixes(self):
+        '''
+        return (value, [(end, offsets), ...]) where value[:end] is each
+        leading run of elements, and offsets are its component offsets
+        '''
+        slash = self._SLASH
+        dot = self._DOT
+        no_name = self._CUR_DIR, self._PREV_DIR
+        elements = self._elements()
+        vol_end = self._split()[0]
+        pieces = []
+        prefixes = []
+        pos = 0
+        joined = True       # the next element needs no separator
+        for i, e in enumerate(elements):
+            if i == 0 and vol_end:
+                pos = vol_end
+                prefixes.append((pos, (pos, pos, pos, pos)))
+            elif e is elements[vol_end and 1 or 0] and e == slash:
+                pos += 1
+                prefixes.append((pos, (vol_end, pos, pos, pos)))
+            else:
+                dirs_end = pos
+                if not joined:
+                    pieces.append(slash)
+                    pos += 1
+                name_start = pos
+                pos += len(e)
+                if e in no_name:
+                    offsets = vol_end, pos, pos, pos
+                else:
+                    ext_start = e.rfind(dot)
+                    if ext_start == -1:
+                        ext_start = len(e)
+                    offsets = vol_end, dirs_end, name_start, name_start + ext_start
+                prefixes.append((pos, offsets))
+                joined = False
+            pieces.append(e)
+        return self._EMPTY.join(pieces), prefixes
+
+    def _dir_elements(self):
+        "the directory part of _elements()"
+        elements = self._elements()
+        vol_end, dirs_end, name_start, ext_start = self._split()
+        start = end = None
+        if vol_end:
+            start = 1
+        if name_start < len(self):
+            end = -1
+        if start is end is None:
+            return elements
+        return elements[start:end]
+
+    @classmethod
+    def _normalize(cls, body):
+        """
+        resolve a raw directory string in one pass over its pieces
+
+        returns (rooted, [dir, ...]) with empty, '.', and cancelled '..'
+        pieces removed; raises ValueError for a '..' above the root
+        """
+        slash, cur_dir, prev_dir = cls._SLASH, cls._CUR_DIR, cls._PREV_DIR
+        rooted = body[:1] == slash
+        dirs = []
+        for piece in body.split(slash):
+            if not piece or piece == cur_dir:
+                continue
+            elif piece != prev_dir:
+                dirs.append(piece)
+            elif dirs and dirs[-1] != prev_dir:
+                dirs.pop()
+            elif rooted:
+                raise ValueError("Too many .. dirs in %r" % (body, ))
+            else:
+                dirs.append(piece)
+        return rooted, dirs
+
+    @classmethod
+    def _normpath(cls, string, offsets):
+        "normpath() of string, whose component offsets are already known"
+        vol_end, dirs_end, name_start, ext_start = offsets
+        slash = cls._SLASH
+        rooted, dirs = cls._normalize(string[vol_end:dirs_end])
+        dirs = slash.join(dirs)
+        filename = string[name_start:]
+        if rooted:
+            dirs = slash + dirs
+        elif not dirs and not filename and name_start > vol_end:
+            # everything cancelled out
+            dirs = cls._CUR_DIR
+        if filename:
+            if dirs and dirs != slash:
+                dirs += slash
+        elif string[-1:] == slash and dirs != slash:
+            dirs += slash
+        return string[:vol_end] + dirs + filename
 
     def __add__(self, other):
         if not isinstance(other, self.base_types):
             return NotImplemented
         elif isinstance(other, self.data_types):
             other = Path(other)
-        return Path(self._value_ + other._value_)
+        return Path(self.data_type.__add__(self, other))
 
     def __contains__(self, text):
         text = text.replace(self._SYS_SEP, self._SLASH)
-        return text in self._value_
+        return self.data_type.__contains__(self, text)
 
     def __div__(self, other):
         if not isinstance(other, self.base_types):
@@ -580,25 +1011,55 @@ class Methods(object):
         if other._vol:
             if self:
                 raise ValueError("Cannot combine %r and %r" % (self, other))
-        return self.__class__(
-                self._value_.rstrip(self._SLASH) +
-                self._SLASH +
-                other._value_.lstrip(self._SLASH)
-                )
+        return self._join(other)
     __truediv__ = __div__
 
+    def _join(self, other):
+        """
+        self / other, keeping self's parse and only splitting other
+        """
+        cls = self.__class__
+        slash = self._SLASH
+        left = self.data_type.rstrip(self, slash)
+        right = other.data_type.lstrip(other, slash)
+        value = left + slash + right
+        if _interned.size:
+            return _interned.lookup(cls, value)
+        if other.data_type is not self.data_type:
+            return cls(value)
+        vol_end = 0
+        if left[:2] == slash+slash or _is_win:
+            vol_end = self._split()[0]
+        if right is other or len(right) == len(other):
+            right_offsets = other._split()
+        else:
+            right_offsets = self._parse(right)
+        if right_offsets[0] or vol_end > len(left):
+            # right side has a volume, or left side is all volume
+            return cls(value)
+        start = len(left) + 1
+        r_vol_end, r_dirs_end, r_name_start, r_ext_start = right_offsets
+        if r_dirs_end:
+            dirs_end = start + r_dirs_end
+        elif start - 1 == vol_end:
+            # make sure we have our initial slash
+            dirs_end = start
+        else:
+            dirs_end = start - 1
+        return self._from_offsets(value, (vol_end, dirs_end, start + r_name_start, start + r_ext_start))
+
     def __eq__(self, other):
         if not isinstance(other, self.base_types):
             return NotImplemented
         elif isinstance(other, self.data_types):
             other = Path(other)
-        return self._value_ == other._value_
+        return self.data_type.__eq__(self, other)
 
     def __hash__(self):
-        return self._value_.__hash__()
+        return self.data_type.__hash__(self)
 
     def __mod__(self, other):
-        return Path(self._value_ % other)
+        return Path(self.data_type.__mod__(self, other))
 
     def __mul__(self, other):
         """
@@ -609,52 +1070,48 @@ class Methods(object):
             return NotImplemented
         elif isinstance(other, self.data_types):
             other = Path(other)
-        if other._vol:
-            vol = other._vol
-            current = []
+        slash = self._SLASH
+        o_vol_end, o_dirs_end, o_name_start, o_ext_start = other._split()
+        next = other[o_vol_end:o_dirs_end]
+        if o_vol_end:
+            vol = other[:o_vol_end]
+            body = next
         else:
-            vol = self._vol
-            current = self.dir_elements
-            if self._filename:
-                current.append(self._filename)
-        next = other.dir_elements
-        if next and next[0] == self._SLASH:
-            current = []
-        dirs = current + next
-        filename = other._filename
-        new_path = []
-        for dir in dirs:
-            if dir not in (self._CUR_DIR, self._PREV_DIR):
-                new_path.append(dir)
-            elif dir == self._PREV_DIR:
-                if len(new_path) == 1 and new_path[0] in (self._SLASH):
-                    raise ValueError("Too many .. dirs in %s" % dirs)
-                elif not new_path or new_path[-1] == self._PREV_DIR:
-                    new_path.append(dir)
-                else:
-                    new_path.pop()
-        if len(new_path) > 1 and new_path[0] == self._SLASH:
-            new_path[0] = self._EMPTY
-        dirs = self._SLASH.join(new_path)
-        if dirs[-1:] != self._SLASH:
-            dirs += self._SLASH
-        if vol[:2] == self._SLASH*2 and dirs[:1] != self._SLASH:
-            dirs = self._SLASH + dirs
-        return Path(self._EMPTY.join([vol, dirs, filename]))
+            vol_end = self._split()[0]
+            vol = self[:vol_end]
+            body = self[vol_end:]
+            if next[:1] == slash or not body:
+                body = next
+            else:
+                body += slash + next
+        rooted, dirs = self._normalize(body)
+        if rooted:
+            dirs = slash + slash.join(dirs + [self._EMPTY]) if dirs else slash
+        else:
+            # an empty relative result has always come back as the root
+            dirs = slash.join(dirs) + slash
+        if vol[:2] == slash*2 and dirs[:1] != slash:
+            dirs = slash + dirs
+        filename = other[o_name_start:]
+        vol_end = len(vol)
+        name_start = vol_end + len(dirs)
+        ext_start = name_start + (o_ext_start - o_name_start)
+        dirs_end = max(name_start - 1, vol_end + 1)
+        return self._from_offsets(vol + dirs + filename, (vol_end, dirs_end, name_start, ext_start))
 
     def __ne__(self, other):
         if not isinstance(other, self.base_types):
             return NotImplemented
         elif isinstance(other, self.data_types):
             other = Path(other)
-        return  self._value_ != other._value_
+        return self.data_type.__ne__(self, other)
 
     def __radd__(self, other):
         if not isinstance(other, self.base_types):
             return NotImplemented
         elif isinstance(other, self.data_types):
             other = Path(other)
-        return Path(other._value_ + self._value_)
+        return Path(other.data_type.__add__(other, self))
 
     def __rdiv__(self, other):
         if not isinstance(other, self.base_types):
@@ -665,10 +1122,14 @@ class Methods(object):
     __rtruediv__ = __rdiv__
 
     def __repr__(self):
-        return "Path(%r)" % self._value_
+        return "Path(%s)" % self.data_type.__repr__(self)
+
+    def __reduce__(self):
+        # the component offsets are recalculated on demand
+        return self.__class__, (self.data_type(self), )
 
     def __rmod__(self, other):
-        return other % (self._value_)
+        return other % (self.data_type(self), )
 
     def __rmul__(self, other):
         if not isinstance(other, self.base_types):
@@ -692,8 +1153,8 @@ class Methods(object):
             return NotImplemented
         elif isinstance(other, self.data_types):
             other = Path(other)
-        s = self._value_
-        o = other._value_
+        s = self.data_type(self)
+        o = other.data_type(other)
         if not s.startswith(o):
             raise ValueError("cannot subtract %r from %r" % (other, self))
         res = Path(s[len(o):])
@@ -711,16 +1172,12 @@ class Methods(object):
         return _os.access(file_name, mode)
 
     def ascend(self):
-        pieces = self.elements
-        absolute = self[0:1] == self._SLASH
-        lead = None
-        if absolute:
-            lead, pieces[0] = pieces[0], ''
-        while len(pieces) > 1:
-            yield self.__class__(self._SLASH.join(pieces))
-            pieces.pop()
-        if absolute:
-            yield lead
+        value, prefixes = self._prefixes()
+        if prefixes and not self.anchor:
+            # relative paths stop before their first element
+            prefixes = prefixes[1:]
+        for end, offsets in reversed(prefixes):
+            yield self._from_offsets(value[:end], offsets)
 
     def chdir(self, subdir=None):
         if subdir is None:
@@ -739,10 +1196,11 @@ class Methods(object):
             elif isinstance(files, self.base_types):
                 files = self.glob(files)
             else:
-                files = [f for fs in files for f in self.glob(fs)]
+                files = self._glob_all(files)
             for file in files:
                 file = self.data_type(file)
                 _os.chflags(file, flags)
+                _stats_changed(file)
 
     elif _py_ver >= (3, 3) and not _is_win:
 
@@ -752,7 +1210,7 @@ class Methods(object):
             elif isinstance(files, self.base_types):
                 files = self.glob(files)
             else:
-                files = [f for fs in files for f in self.glob(fs)]
+                files = self._glob_all(files)
             for file in files:
                 file = self.data_type(file)
                 if follow_symlinks == True:
@@ -761,6 +1219,7 @@ class Methods(object):
                     _os.chflags(file, flags, follow_symlinks=False)
                 else:
                     raise ValueError('follow_symlinks must be True or False, not %r' % follow_symlinks)
+                _stats_changed(file)
 
     if _py_ver < (3, 3):
 
@@ -771,10 +1230,11 @@ class Methods(object):
             elif isinstance(files, self.base_types):
                 files = self.glob(files)
             else:
-                files = [f for fs in files for f in self.glob(fs)]
+                files = self._glob_all(files)
             for file in files:
                 file = self.data_type(file)
                 _os.chmod(file, mode)
+                _stats_changed(file)
 
     else:
 
@@ -785,7 +1245,7 @@ class Methods(object):
             elif isinstance(files, self.base_types):
                 files = self.glob(files)
             else:
-                files = [f for fs in files for f in self.glob(fs)]
+                files = self._glob_all(files)
             for file in files:
                 file = self.data_type(file)
                 if follow_symlinks == True:
@@ -794,6 +1254,7 @@ class Methods(object):
                     _os.chmod(file, mode, follow_symlinks=False)
                 else:
                     raise ValueError('follow_symlinks must be True or False, not %r' % follow_symlinks)
+                _stats_changed(file)
 
     if _py_ver < (3, 3):
 
@@ -804,10 +1265,11 @@ class Methods(object):
             elif isinstance(files, self.base_types):
                 files = self.glob(files)
             else:
-                files = [f for fs in files for f in self.glob(fs)]
+                files = self._glob_all(files)
             for file in files:
                 file = self.data_type(file)
                 _os.chown(file, uid, gid)
+                _stats_changed(file)
 
     else:
 
@@ -818,7 +1280,7 @@ class Methods(object):
             elif isinstance(files, self.base_types):
                 files = self.glob(files)
             else:
-                files = [f for fs in files for f in self.glob(fs)]
+                files = self._glob_all(files)
             for file in files:
                 file = self.data_type(file)
                 if follow_symlinks == True:
@@ -827,6 +1289,7 @@ class Methods(object):
                     _os.chown(file, uid, gid, follow_symlinks=False)
                 else:
                     raise ValueError('follow_symlinks must be True or False, not %r' % follow_symlinks)
+                _stats_changed(file)
 
     if not _is_win:
         def chroot(self, subdir=None):
@@ -847,7 +1310,7 @@ class Methods(object):
 
     def copy(self, files, dst=None):
         """
-        thin wrapper around shutil.copy2  (files is optional)
+        shutil.copy2 with the data copied by Path.copier (files is optional)
         """
         if dst is None:
             dst, files = files, None
@@ -856,30 +1319,42 @@ class Methods(object):
         elif isinstance(files, self.base_types):
             files = self.glob(files)
         else:
-            files = [f for fs in files for f in self.glob(fs)]
+            files = self._glob_all(files)
         dst = self.data_type(dst)
         for file in files:
             src = self.data_type(file)
-            _shutil.copy2(src, dst)
+            _stats_changed(_copier.copy2(src, dst))
 
     if _py_ver < (2, 6):
 
         def copytree(self, dst, symlinks=False):
             'thin wrapper around shutil.copytree'
             src, dst = base_class(self, dst)
-            return _shutil.copytree(src, dst, symlinks) or dst
+            result = _shutil.copytree(src, dst, symlinks)
+            _stats_changed(dst, tree=True)
+            return result or dst
 
     elif _py_ver < (3, 2):
 
         def copytree(self, dst, symlinks=False, ignore=None):
             'thin wrapper around shutil.copytree'
             src, dst = base_class(self, dst)
-            return _shutil.copytree(src, dst, symlinks, ignore) or dst
+            result = _shutil.copytree(src, dst, symlinks, ignore)
+            _stats_changed(dst, tree=True)
+            return result or dst
 
     elif _py_ver < (3, 8):
 
-        def copytree(self, dst, symlinks=False, ignore=None, copy_function=None, ignore_dangling_symlinks=False):
-            'thin wrapper around shutil.copytree'
+        def copytree(self, dst, symlinks=False, ignore=None, copy_function=None, ignore_dangling_symlinks=False, workers=None, executor=None):
+            """
+            thin wrapper around shutil.copytree; with workers or executor, see
+            _copytree_parallel()
+            """
+            if workers is not None or executor is not None:
+                return self._copytree_parallel(
+                        dst, symlinks, ignore, copy_function, ignore_dangling_symlinks, False,
+                        workers, executor,
+                        )
             src, dst = base_class(self, dst)
             kwds = {
                     'symlinks': symlinks,
@@ -888,12 +1363,22 @@ class Methods(object):
                     }
             if copy_function:
                 kwds['copy_function'] = copy_function
-            return _shutil.copytree(src, dst, **kwds) or dst
+            result = _shutil.copytree(src, dst, **kwds)
+            _stats_changed(dst, tree=True)
+            return result or dst
 
     else:
 
-        def copytree(self, dst, symlinks=False, ignore=None, copy_function=None, ignore_dangling_symlinks=False, dirs_exist_ok=False):
-            'thin wrapper around shutil.copytree'
+        def copytree(self, dst, symlinks=False, ignore=None, copy_function=None, ignore_dangling_symlinks=False, dirs_exist_ok=False, workers=None, executor=None):
+            """
+            thin wrapper around shutil.copytree; with workers or executor, see
+            _copytree_parallel()
+            """
+            if workers is not None or executor is not None:
+                return self._copytree_parallel(
+                        dst, symlinks, ignore, copy_function, ignore_dangling_symlinks, dirs_exist_ok,
+                        workers, executor,
+                        )
             src, dst = base_class(self, dst)
             kwds = {
                     'symlinks': symlinks,
@@ -903,23 +1388,88 @@ class Methods(object):
                     }
             if copy_function:
                 kwds['copy_function'] = copy_function
-            return _shutil.copytree(src, dst, **kwds) or dst
+            result = _shutil.copytree(src, dst, **kwds)
+            _stats_changed(dst, tree=True)
+            return result or dst
+
+    if _py_ver >= (3, 2):
+
+        def _copytree_parallel(self, dst, symlinks, ignore, copy_function, ignore_dangling_symlinks, dirs_exist_ok, workers, executor):
+            """
+            copytree() that makes the whole directory skeleton first, then
+            copies the files workers at a time (or on executor); symlinks,
+            ignore, copy_function, ignore_dangling_symlinks, and dirs_exist_ok
+            work as for shutil.copytree, but errors below the top directory are
+            returned, not raised, in a BulkResult whose succeeded holds the
+            source files copied
+            """
+            start = _time.time()
+            if copy_function is None:
+                copy_function = _copier.copy2
+            src, dst = base_class(self, dst)
+            failed = []
+            # (source, destination) of every file, and of every directory
+            # in the order made
+            files = {}
+            dirs = []
+            pending = [(src, dst)]
+            while pending:
+                src_dir, dst_dir = pending.pop()
+                try:
+                    entries = _dir_kinds(src_dir)
+                    names = [name for name, is_link, is_dir in entries]
+                    ignored = ignore(src_dir, names) if ignore is not None else ()
+                    _os.makedirs(dst_dir, exist_ok=dirs_exist_ok)
+                except OSError:
+                    if src_dir is src:
+                        raise
+                    failed.append((Path(src_dir), _sys.exc_info()[1]))
+                    continue
+                dirs.append((src_dir, dst_dir))
+                for name, is_link, is_dir in entries:
+                    if name in ignored:
+                        continue
+                    src_name = _os.path.join(src_dir, name)
+                    dst_name = _os.path.join(dst_dir, name)
+                    if is_link and symlinks:
+                        try:
+                            _os.symlink(_os.readlink(src_name), dst_name)
+                            _shutil.copystat(src_name, dst_name, follow_symlinks=False)
+                        except OSError:
+                            failed.append((Path(src_name), _sys.exc_info()[1]))
+                    elif is_link and ignore_dangling_symlinks and not _os.path.exists(src_name):
+                        continue
+                    elif is_dir:
+                        pending.append((src_name, dst_name))
+                    else:
+                        files[src_name] = dst_name
+            result = self._bulk(
+                    'copytree',
+                    lambda src_name: copy_function(src_name, files[src_name]),
+                    list(files), workers, executor,
+                    )
+            # directory times last, so the copies do not change them
+            for src_dir, dst_dir in reversed(dirs):
+                try:
+                    _shutil.copystat(src_dir, dst_dir)
+                except OSError:
+                    if getattr(_sys.exc_info()[1], 'winerror', None) is None:
+                        failed.append((Path(src_dir), _sys.exc_info()[1]))
+            result.failed.extend(failed)
+            result.elapsed = _time.time() - start
+            _stats_changed(dst, tree=True)
+            return result
 
     def count(self, sub, start=None, end=None):
         new_sub = sub.replace(self._SYS_SEP, self._SLASH)
         start = start or 0
         end = end or len(self)
-        return (self._value_).count(new_sub)
+        return self.data_type.count(self, new_sub)
 
     def descend(self):
-        pieces = self.elements
-        if not pieces:
-            return
-        lead, pieces = pieces[0], pieces[1:]
-        yield lead
-        for p in pieces:
-            lead /= p
-            yield lead
+        value, prefixes = self._prefixes()
+        for end, offsets in prefixes:
+            yield self._from_offsets(value[:end], offsets)
 
     def endswith(self, suffix, start=None, end=None):
         if isinstance(suffix, self.base_types):
@@ -931,19 +1481,21 @@ class Methods(object):
                 raise TypeError("Can't convert %r implicitly" % suffix.__class__)
         start = start or 0
         end = end or len(self)
-        return (self._value_).endswith(new_suffix, start, end)
+        return self.data_type.endswith(self, new_suffix, start, end)
 
     def exists(self, name=None):
         if name is not None:
             self /= name
         self = self.data_type(self)
+        if Path.stats.size:
+            return _cached_mode(self) is not None
         return _os.path.exists(self)
 
     def find(self, sub, start=None, end=None):
         new_sub = sub.replace(self._SYS_SEP, self._SLASH)
         start = start or 0
         end = end or len(self)
-        return (self._value_).find(new_sub)
+        return self.data_type.find(self, new_sub)
 
     def format(self, other):
         raise AttributeError("'Path' object has no attribute 'format'")
@@ -952,9 +1504,16 @@ class Methods(object):
         raise AttributeError("'Path' object has no attribute 'format_map'")
 
     def glob(self, pattern=None):
+        pattern = self._glob_pattern(pattern)
+        if not hasattr(_os, 'scandir'):
+            return _native_glob(pattern)
+        return GlobPattern(pattern).glob()
+
+    def _glob_pattern(self, pattern):
+        "the full pattern glob(pattern) looks for"
         if self and pattern:
             pattern = self/pattern
-        elif self and (self._STAR in self or self._QUESTION in self):
+        elif self and (self._STAR in self or self._QUESTION in self or _glob_braces(_glob_text(self))):
                 pattern = self
         elif self:
                 pattern = self / self._STAR
@@ -962,7 +1521,55 @@ class Methods(object):
             pass
         else:
             pattern = self._STAR
-        return [Path(p) for p in native_glob(pattern)]
+        return pattern
+
+    def _glob_all(self, patterns, keep_unmatched=False):
+        """
+        glob() of every pattern in patterns, in order, with every directory
+        listed once however many patterns need it, and every match given
+        once; with keep_unmatched, a pattern that matches nothing is kept
+        (as the path glob() looked for)
+        """
+        patterns = [self._glob_pattern(p) for p in patterns]
+        if not patterns:
+            return []
+        # GlobPattern gives each match once; names looked up directly may
+        # repeat it
+        unique = True
+        if not hasattr(_os, 'scandir'):
+            found = [_native_glob(pattern) for pattern in patterns]
+        else:
+            found = [[] for pattern in patterns]
+            # plain names only need looking up
+            wild = []
+            for i, pattern in enumerate(patterns):
+                if not _glob_literal(pattern):
+                    wild.append(i)
+                elif _os.path.lexists(pattern):
+                    found[i].append(Path(pattern))
+                    unique = False
+            if wild:
+                for numbers, path in GlobPattern(*[patterns[i] for i in wild])._search_all():
+                    found[wild[numbers[0]]].append(path)
+        result = []
+        seen = set()
+        for pattern, matches in zip(patterns, found):
+            if not unique:
+                matches = [m for m in matches if m not in seen]
+                seen.update(matches)
+            if matches:
+                result.extend(matches)
+            elif keep_unmatched:
+                result.append(Path(pattern))
+        return result
+
+    if hasattr(_os, 'scandir'):
+
+        def iglob(self, pattern=None):
+            """
+            generate the matches of self/pattern one at a time (see GlobPattern)
+            """
+            return GlobPattern(self._glob_pattern(pattern)).iglob()
 
     def index(self, sub, start=None, end=None):
         result = self.find(sub, start, end)
@@ -970,25 +1577,55 @@ class Methods(object):
             raise ValueError('substring not found')
         return result
 
+    if hasattr(_os, 'scandir'):
+
+        def inode(self):
+            "inode number of path (symlinks are not followed)"
+            try:
+                return self._entry_.inode()
+            except AttributeError:
+                return _os.lstat(self.data_type(self)).st_ino
+
     def isabs(self):
         return _os.path.isabs(self.data_type(self))
 
     def isdir(self, name=None):
         if name is not None:
             self /= name
+        else:
+            try:
+                return self._entry_.is_dir()
+            except AttributeError:
+                pass
         self = self.data_type(self)
+        if Path.stats.size:
+            return _stat.S_ISDIR(_cached_mode(self) or 0)
         return _os.path.isdir(self)
 
     def isfile(self, name=None):
         if name is not None:
             self /= name
+        else:
+            try:
+                return self._entry_.is_file()
+            except AttributeError:
+                pass
         self = self.data_type(self)
+        if Path.stats.size:
+            return _stat.S_ISREG(_cached_mode(self) or 0)
         return _os.path.isfile(self)
 
     def islink(self, name=None):
         if name is not None:
             self /= name
+        else:
+            try:
+                return self._entry_.is_symlink()
+            except AttributeError:
+                pass
         self = self.data_type(self)
+        if Path.stats.size:
+            return _stat.S_ISLNK(_cached_mode(self, False) or 0)
         return _os.path.islink(self)
 
     def ismount(self, name=None):
@@ -1000,25 +1637,39 @@ class Methods(object):
     def iter_all(self, name=None):
         if name is not None:
             self /= name
-        result = list(self.iter_dirs())
-        if self.vol:
-            result.insert(0, self.vol)
-        if self.filename:
-            result.append(self.filename)
-        return iter(result)
+        return iter(self._elements())
 
     def iter_dirs(self, name=None):
         if name is not None:
             self /= name
-        result = []
-        cls = self.__class__
-        if self._dirs:
-            if self._dirs[0] == self._SLASH:
-                result = [cls(self._SLASH)]
-            dirs = self._dirs.strip(self._SLASH)
-            if dirs:
-                result.extend([cls(d) for d in dirs.split(self._SLASH)])
-        return iter(result)
+        return iter(self._dir_elements())
+
+    def joinpath(self, *others):
+        """
+        self / others[0] / others[1] / ..., splitting the result only once
+
+        system separators in others are converted to '/'
+        """
+        slash = self._SLASH
+        sys_sep = self._SYS_SEP
+        pieces = [self.data_type.rstrip(self, slash)]
+        last = len(others) - 1
+        for i, other in enumerate(others):
+            if not isinstance(other, self.base_types):
+                raise TypeError('cannot join %r and %r' % (self, other))
+            other = ospath(other).replace(sys_sep, slash)
+            if other[:2] == slash+slash or _is_win:
+                if Path(other)._vol and (i or self):
+                    raise ValueError("Cannot combine %r and %r" % (slash.join(pieces), other))
+            if i == last:
+                pieces.append(other.lstrip(slash))
+            else:
+                other = other.strip(slash)
+                if other:
+                    pieces.append(other)
+        if len(pieces) == 1:
+            return self
+        return self.__class__(slash.join(pieces))
 
     if hasattr(_os, 'lchflags'):
 
@@ -1028,10 +1679,11 @@ class Methods(object):
             elif isinstance(files, self.base_types):
                 files = self.glob(files)
             else:
-                files = [f for fs in files for f in self.glob(fs)]
+                files = self._glob_all(files)
             for file in files:
                 file = self.data_type(file)
                 _os.chflags(file, flags)
+                _stats_changed(file)
 
     if hasattr(_os, 'lchmod'):
 
@@ -1041,10 +1693,11 @@ class Methods(object):
             elif isinstance(files, self.base_types):
                 files = self.glob(files)
             else:
-                files = [f for fs in files for f in self.glob(fs)]
+                files = self._glob_all(files)
             for file in files:
                 file = self.data_type(file)
                 _os.lchmod(file, mode)
+                _stats_changed(file)
 
     if hasattr(_os, 'lchown'):
 
@@ -1054,10 +1707,11 @@ class Methods(object):
             elif isinstance(files, self.base_types):
                 files = self.glob(files)
             else:
-                files = [f for fs in files for f in self.glob(fs)]
+                files = self._glob_all(files)
             for file in files:
                 file = self.data_type(file)
                 _os.lchown(file, uid, gid)
+                _stats_changed(file)
 
     if hasattr(_os.path, 'lexists'):
 
@@ -1065,6 +1719,8 @@ class Methods(object):
             if file_name is not None:
                 self /= file_name
             self = self.data_type(self)
+            if Path.stats.size:
+                return _cached_mode(self, False) is not None
             return _os.path.lexists(self)
 
     if not _is_win:
@@ -1076,7 +1732,41 @@ class Methods(object):
             else:
                 source = self/source
             source, new_name = base_class(source, new_name)
-            return _os.link(source, new_name)
+            _os.link(source, new_name)
+            _stats_changed(new_name)
+
+    if hasattr(_os, 'scandir'):
+
+        def iterdir(self, subdir=None, kind=None):
+            """
+            generate the Paths in self (or self/subdir), one at a time
+
+            built on os.scandir, so each Path keeps its DirEntry (see scan()),
+            or just its type when the listing comes from Path.listings;
+            kind limits them to 'dir', 'file', or 'link' entries, or to the
+            entries a callable returns True for (any other kind is a
+            ValueError at once, not when iteration starts); the directory is
+            closed as soon as iteration stops or the generator is closed
+            """
+            if self and subdir:
+                subdir = self / subdir
+            elif self:
+                subdir = self
+            elif subdir:
+                subdir = Path(subdir)
+            if kind is None or callable(kind):
+                accept = kind
+            elif kind in _entry_kinds:
+                accept = _entry_kinds[kind]
+            else:
+                raise ValueError("kind should be 'dir', 'file', 'link', or a callable, not %r" % (kind, ))
+            if subdir:
+                cls = subdir.__class__
+                prefix = subdir.data_type.rstrip(subdir, subdir._SLASH) + subdir._SLASH
+                return _iterdir(cls, prefix, subdir.data_type(subdir), accept)
+            else:
+                # the current directory: bare names, as with listdir()
+                return _iterdir(self.__class__, self._EMPTY, self._CUR_DIR, accept)
 
     def listdir(self, subdir=None):
         if self and subdir:
@@ -1087,20 +1777,27 @@ class Methods(object):
             pass
         else:
             subdir = self.__class__(self._DOT)
-        return [Path(p) for p in _os.listdir(subdir)]
+        return _listdir(subdir)
 
     if hasattr(_os, 'lstat'):
 
         def lstat(self, file_name=None):
             if file_name is not None:
                 self /= file_name
+            else:
+                try:
+                    return self._entry_.stat(follow_symlinks=False)
+                except AttributeError:
+                    pass
             self = self.data_type(self)
+            if Path.stats.size:
+                return Path.stats.stat(self, False)
             return _os.lstat(self)
 
     def lstrip(self, chars=None):
         if chars is not None:
             chars = chars.replace(self._SYS_SEP, self._SLASH)
-        return self.__class__((self._value_).lstrip(chars))
+        return self.__class__(self.data_type.lstrip(self, chars))
 
     if hasattr(_os, 'mkfifo'):
 
@@ -1111,7 +1808,8 @@ class Methods(object):
             else:
                 name = self/name
             name = self.data_type(name)
-            return _os.mkfifo(name, mode)
+            _os.mkfifo(name, mode)
+            _stats_changed(name)
 
     def mkdir(self, subdirs=None, mode=None, owner=None):
         """
@@ -1129,19 +1827,21 @@ class Methods(object):
         elif isinstance(subdirs, self.base_types):
             subdirs = [self/subdirs]
         else:
-            subdirs = [d for ds in subdirs for d in self.glob(ds)]
+            subdirs = self._glob_all(subdirs)
         if mode is None:
             for subdir in subdirs:
                 subdir = self.data_type(subdir)
                 _os.mkdir(subdir)
                 if owner is not None:
                     _os.chown(subdir, *owner)
+                _stats_changed(subdir)
         else:
             for subdir in subdirs:
                 subdir = self.data_type(subdir)
                 _os.mkdir(subdir, mode)
                 if owner is not None:
                     _os.chown(subdir, *owner)
+                _stats_changed(subdir)
 
     def makedirs(self, subdirs=None, mode=None, owner=None):
         """
@@ -1159,20 +1859,15 @@ class Methods(object):
         elif isinstance(subdirs, self.base_types):
             subdirs = [self/subdirs]
         else:
-            subdirs = [d for ds in subdirs for d in self.glob(ds)]
+            subdirs = self._glob_all(subdirs)
         for subdir in subdirs:
-            path = Path('.')
-            if subdir.isabs():
-                path = Path()
-            elements = subdir.elements
-            for i, dir in enumerate(elements, start=4):
-                path /= dir
-                if not path.exists():
-                    path.mkdir(mode=mode, owner=owner)
-
-    def move(self, files, dst=None):
+            _makedirs(self.data_type(subdir), mode, owner)
+
+    def move(self, files, dst=None, workers=None, executor=None):
         """
         thin wrapper around shutil.move  (files is optional)
+
+        with workers or executor, see _move_bulk()
         """
         if dst is None:
             dst, files = files, None
@@ -1181,16 +1876,28 @@ class Methods(object):
         elif isinstance(files, self.base_types):
             files = self.glob(files)
         else:
-            files = [f for fs in files for f in self.glob(fs)]
+            files = self._glob_all(files)
+        if workers is not None or executor is not None:
+            return _move_bulk(files, Path(dst), workers, executor)
         dst = self.data_type(dst)
         for file in files:
             src = self.data_type(file)
             real_dst = dst
-            if _os.path.exists(real_dst) and _os.path.isdir(real_dst):
+            if Path.isdir(real_dst):
                 real_dst += self._SLASH + _os.path.basename(src.rstrip(self._SLASH))
             _shutil.move(src, real_dst)
+            _stats_changed(src, tree=True)
+            _stats_changed(real_dst, tree=True)
         return real_dst
 
+    def normpath(self):
+        """
+        path with repeated slashes, '.', and '..' removed
+
+        a trailing slash is kept; ValueError if '..' would go above the root
+        """
+        return self._from_offsets(self._normpath(self, self._split()))
+
     def open(self, file_name=None, mode=None, buffering=None, encoding=None):
         """
         encoding is only supported on Python3+
@@ -1213,6 +1920,8 @@ class Methods(object):
         file_name = self.data_type(file_name)
         if mode is None:
             mode = 'r'
+        elif mode[:1] != 'r' or '+' in mode:
+            _stats_changed(file_name)
         if buffering is encoding is None:
             return open(file_name, mode)
         elif encoding is None:
@@ -1239,7 +1948,7 @@ class Methods(object):
             return _os.readlink(self)
 
     def relpath(self, start='.'):
-        return Path(_os.path.relpath(self._value_, start))
+        return Path(_os.path.relpath(self.data_type(self), start))
 
     def removedirs(self, subdirs=None):
         if subdirs is None:
@@ -1247,10 +1956,11 @@ class Methods(object):
         elif isinstance(subdirs, self.base_types):
             subdirs = self.glob(subdirs)
         else:
-            subdirs = [d for ds in subdirs for d in self.glob(ds)]
+            subdirs = self._glob_all(subdirs)
         for subdir in subdirs:
             subdir = self.data_type(subdir)
             _os.removedirs(subdir)
+            _stats_changed(subdir, tree=True, parents=True)
 
     def rename(self, file_name, dst=None):
         'thin wrapper around os.rename)'
@@ -1261,6 +1971,8 @@ class Methods(object):
             file_name = self/file_name
         src, dst = base_class(file_name, dst)
         _os.rename(src, dst)
+        _stats_changed(src, tree=True)
+        _stats_changed(dst, tree=True)
         return dst
 
     def renames(self, file_name, dst=None):
@@ -1270,15 +1982,18 @@ class Methods(object):
         else:
             file_name = self/file_name
         src, dst = base_class(file_name, dst)
-        return _os.renames(src, dst)
+        result = _os.renames(src, dst)
+        _stats_changed(src, tree=True, parents=True)
+        _stats_changed(dst, tree=True, parents=True)
+        return result
 
     def replace(self, old, new, count=None):
         old = old.replace(self._SYS_SEP, self._SLASH)
         new = new.replace(self._SYS_SEP, self._SLASH)
         if count:
-            return self.__class__((self._value_).replace(old, new, count))
+            return self.__class__(self.data_type.replace(self, old, new, count))
         else:
-            return self.__class__((self._value_).replace(old, new))
+            return self.__class__(self.data_type.replace(self, old, new))
 
     def rmdir(self, subdirs=None):
         'thin wrapper around os.rmdir'
@@ -1287,13 +2002,29 @@ class Methods(object):
         elif isinstance(subdirs, self.base_types):
             subdirs = self.glob(subdirs)
         else:
-            subdirs = [d for ds in subdirs for d in self.glob(ds)]
+            subdirs = self._glob_all(subdirs)
         for subdir in subdirs:
             subdir = self.data_type(subdir)
             _os.rmdir(subdir)
+            _stats_changed(subdir)
 
-    def rmtree(self, subdirs=None, ignore_errors=None, onerror=None):
-        'thin wrapper around shutil.rmtree'
+    def rmtree(self, subdirs=None, ignore_errors=None, onerror=None, workers=None, executor=None, defer=False):
+        """
+        thin wrapper around shutil.rmtree
+
+        with workers (or executor, a concurrent.futures.Executor) the tree is
+        walked through open directory descriptors and its files are unlinked
+        on a thread pool, several sibling directories at a time; onerror is
+        still called for each failure, one call at a time.  That needs
+        concurrent.futures and os functions that take dir_fd (Python 3.7+,
+        and not on Windows); without them workers and executor are ignored
+        and each target is removed by shutil.rmtree, one after another
+
+        with defer, each directory is moved into Path.trash and deleted in
+        the background; one that cannot be moved is deleted as usual
+        """
+        if workers is not None and workers < 1:
+            raise ValueError('workers must be 1 or more, not %r' % (workers, ))
         if subdirs is not None and not isinstance(subdirs, self.base_types):
             if ignore_errors and onerror:
                 raise ValueError('subdirs should be a string or Path instance, not %r' % type(subdirs))
@@ -1306,20 +2037,86 @@ class Methods(object):
         elif isinstance(subdirs, self.base_types):
             subdirs = self.glob(subdirs)
         else:
-            subdirs = [d for ds in subdirs for d in self.glob(ds)]
+            subdirs = self._glob_all(subdirs)
+        parallel = _rmtree_by_fd and (executor is not None or workers not in (None, 1))
         for target in subdirs:
             target = self.data_type(target)
-            if ignore_errors is None and onerror is None:
+            if defer and _trash.defer(target, directory=True):
+                pass
+            elif parallel:
+                _rmtree_parallel(target, ignore_errors, onerror, workers, executor)
+            elif ignore_errors is None and onerror is None:
                 _shutil.rmtree(target)
             elif ignore_errors is not None and onerror is None:
                 _shutil.rmtree(target, ignore_errors)
             elif onerror is not None:
                 _shutil.rmtree(target, ignore_errors, onerror)
+            _stats_changed(target, tree=True)
 
     def rstrip(self, chars=None):
         if chars is not None:
             chars = chars.replace(self._SYS_SEP, self._SLASH)
-        return self.__class__((self._value_).rstrip(chars))
+        return self.__class__(self.data_type.rstrip(self, chars))
+
+    if hasattr(_os, 'scandir'):
+
+        def scan(self, topdown=True, onerror=None, followlinks=False):
+            """
+            like walk(), but built directly on os.scandir
+
+            dirnames and filenames hold full Paths that keep the os.DirEntry
+            they were found with, so isdir(), isfile(), islink(), lstat(), and
+            inode() on them need no further system calls, and stat() needs at
+            most one; those answers are as of the scan
+            """
+            if topdown not in (True, False):
+                raise ValueError('topdown should be True or False, not %r' % topdown)
+            cls = self.__class__
+            slash = self._SLASH
+            # (dirpath, None) is still to be scanned, (dirpath, result) is a
+            # bottom-up result waiting for its subdirectories
+            pending = [(self, None)]
+            while pending:
+                dirpath, result = pending.pop()
+                if result is not None:
+                    yield result
+                    continue
+                dirnames = []
+                filenames = []
+                try:
+                    entries = _os.scandir(dirpath.data_type(dirpath))
+                except OSError as exc:
+                    if onerror is not None:
+                        onerror(exc)
+                    continue
+                prefix = dirpath.data_type.rstrip(dirpath, slash) + slash
+                try:
+                    try:
+                        for entry in entries:
+                            path = cls._from_entry(prefix, entry)
+                            try:
+                                is_dir = entry.is_dir()
+                            except OSError:
+                                is_dir = False
+                            if is_dir:
+                                dirnames.append(path)
+                            else:
+                                filenames.append(path)
+                    except OSError as exc:
+                        if onerror is not None:
+                            onerror(exc)
+                        continue
+                finally:
+                    _close(entries)
+                if topdown:
+                    yield dirpath, dirnames, filenames
+                else:
+                    pending.append((dirpath, (dirpath, dirnames, filenames)))
+                for subdir in reversed(dirnames):
+                    if not isinstance(subdir, Methods):
+                        subdir = cls(subdir)
+                    if followlinks or not subdir.islink():
+                        pending.append((subdir, None))
 
     def startswith(self, prefix, start=None, end=None):
         if isinstance(prefix, self.base_types):
@@ -1331,12 +2128,19 @@ class Methods(object):
                 raise TypeError("Can't convert %r to %s implicitly" % (prefix.__class__, self.__class__.__name__))
         start = start or 0
         end = end or len(self)
-        return (self._value_).startswith(new_prefix, start, end)
+        return self.data_type.startswith(self, new_prefix, start, end)
 
     def stat(self, file_name=None):
         if file_name is not None:
             self /= file_name
+        else:
+            try:
+                return self._entry_.stat()
+            except AttributeError:
+                pass
         self = self.data_type(self)
+        if Path.stats.size:
+            return Path.stats.stat(self)
         return _os.stat(self)
 
     if not _is_win:
@@ -1350,7 +2154,7 @@ class Methods(object):
     def strip(self, chars=None):
         if chars is not None:
             chars = chars.replace(self._SYS_SEP, self._SLASH)
-        return self.__class__((self._value_).strip(chars))
+        return self.__class__(self.data_type.strip(self, chars))
 
     def strip_ext(self, remove=1):
         remove_all = False
@@ -1359,7 +2163,7 @@ class Methods(object):
             remove = -1
         while (remove_all or remove > 0) and self.ext:
             remove -= 1
-            self = self.__class__(self._value_[:-len(self._ext)])
+            self = self.__class__(self[:-len(self._ext)])
         return self
 
     if not _is_win:
@@ -1371,6 +2175,7 @@ class Methods(object):
                 source = self/source
             source, new_name = base_class(source, new_name)
             _os.symlink(source, new_name)
+            _stats_changed(new_name)
             return new_name
 
     def touch(self, files=None, times=None, no_create=False, reference=None):
@@ -1412,33 +2217,29 @@ class Methods(object):
         elif isinstance(files, self.base_types):
             files = self.glob(files) or [self/files]
         else:
-            files = [f for fs in files for f in (self.glob(fs) or [self/fs])]
+            files = self._glob_all(files, keep_unmatched=True)
         for file in files:
-            if not Path(file).exists():
-                if no_create:
-                    pass
-                else:
-                    file = self.data_type(file)
-                    with open(file, 'w'):
-                        pass
-                    if times is not None:
-                        _os.utime(file, times)
-            else:
-                file = self.data_type(file)
-                _os.utime(file, times)
+            _touch(self.data_type(file), times, no_create)
+
 
+    def unlink(self, files=None, defer=False):
+        """
+        thin wrapper around os.unlink
 
-    def unlink(self, files=None):
-        "thin wrapper around os.unlink"
+        with defer, each file is moved into Path.trash and deleted in the
+        background; one that cannot be moved is deleted as usual
+        """
         if files is None:
             files = [self]
         elif isinstance(files, self.base_types):
             files = self.glob(files)
         else:
-            files = [f for fs in files for f in self.glob(fs)]
+            files = self._glob_all(files)
         for target in files:
             target = self.data_type(target)
-            _os.unlink(target)
+            if not (defer and _trash.defer(target, directory=False)):
+                _os.unlink(target)
+            _stats_changed(target)
     remove = unlink
 
     def utime(self, files, times=None):
@@ -1451,10 +2252,11 @@ class Methods(object):
         elif isinstance(files, self.base_types):
             files = self.glob(files)
         else:
-            files = [f for fs in files for f in self.glob(fs)]
+            files = self._glob_all(files)
         for file in files:
             file = self.data_type(file)
             _os.utime(file, times)
+            _stats_changed(file)
 
     if _py_ver >= (2, 6):
         def walk(self, topdown=True, onerror=None, followlinks=False):
@@ -1480,6 +2282,8 @@ class Methods(object):
                 yield dirpath, dirnames, filenames
 
 class bPath(Methods, Path, bytes):
+    # bytes subclasses cannot have __slots__, so _offsets_, _elements_, and
+    # _entry_ live in __dict__
     _COLON = ':'.encode('ascii')
     _CUR_DIR = '.'.encode('ascii')
     _DOT = '.'.encode('ascii')
@@ -1496,6 +2300,7 @@ class bPath(Methods, Path, bytes):
     _STAR = '*'.encode('ascii')
 
 class uPath(Methods, Path, unicode):
+    __slots__ = ('_offsets_', '_elements_', '_entry_')
     _COLON = unicode(':')
     _CUR_DIR = unicode('.')
     _DOT = unicode('.')
@@ -1535,6 +2340,1693 @@ else:
 Marshaller.dispatch[uPath] = Marshaller.dump_unicode
 del Marshaller
 
+class _LRUTable(object):
+    """
+    what Path's caches have in common: a bounded, thread-safe table whose
+    oldest entries go first, with hits and misses counted; off until given
+    a size
+    """
+
+    def __init__(self, size=0):
+        self._lock = _threading.Lock()
+        self._table = OrderedDict()
+        self.size = 0
+        self.hits = self.misses = 0
+        self.resize(size)
+
+    def __len__(self):
+        return len(self._table)
+
+    def clear(self):
+        "empty the table and reset the counters"
+        with self._lock:
+            self._table.clear()
+            self.hits = self.misses = 0
+
+    def resize(self, size):
+        "keep at most size entries; 0 turns the table off (and empties it)"
+        if size < 0:
+            raise ValueError('size must be 0 or more, not %r' % (size, ))
+        with self._lock:
+            self.size = size
+            self._trim()
+
+    def _trim(self):
+        # called with the lock held
+        table = self._table
+        while len(table) > self.size:
+            table.popitem(last=False)
+
+
+class _ExpiringTable(_LRUTable):
+    "an _LRUTable whose entries are also only good for ttl seconds (None for ever)"
+
+    def __init__(self, size=0, ttl=None):
+        self.ttl = ttl
+        super(_ExpiringTable, self).__init__(size)
+
+    @contextmanager
+    def enabled(self, size, ttl):
+        "turn the table on within a with block, restoring the previous settings after"
+        old_size, old_ttl = self.size, self.ttl
+        self.resize(size)
+        self.ttl = ttl
+        try:
+            yield self
+        finally:
+            self.resize(old_size)
+            self.ttl = old_ttl
+
+
+class _InternTable(_LRUTable):
+    """
+    bounded, thread-safe LRU table of already-parsed Paths, keyed by
+    class and value; off until given a size:
+
+        Path.interned.resize(4096)
+        ...
+        Path.interned.hits, Path.interned.misses
+        Path.interned.resize(0)     # off (and emptied) again
+    """
+
+    def __repr__(self):
+        return '<interned Paths: %d of %d, %d hits, %d misses>' % (
+                len(self._table), self.size, self.hits, self.misses,
+                )
+
+    def lookup(self, cls, value):
+        "return the interned cls(value), creating it if needed"
+        key = cls, value
+        table = self._table
+        with self._lock:
+            p = table.pop(key, None)
+            if p is not None:
+                table[key] = p
+                self.hits += 1
+                return p
+            self.misses += 1
+        p = cls.data_type.__new__(cls, value)
+        p._split()
+        with self._lock:
+            table[key] = p
+            self._trim()
+        return p
+
+Path.interned = _interned = _InternTable()
+
+
+# a listing is only kept once its directory has been unchanged this long
+# (seconds), as a change within the same mtime tick would go unseen
+_LISTING_SETTLE = 2.0
+_monotonic = getattr(_time, 'monotonic', _time.time)
+
+class _ListingCache(_ExpiringTable):
+    """
+    bounded, thread-safe LRU cache of directory listings for glob(),
+    iglob(), listdir(), and iterdir(), keyed by directory; off until given
+    a size:
+
+        Path.listings.resize(1024)          # for the whole process
+        Path.listings.ttl = 30              # optional, in seconds
+        ...
+        with Path.listings.enabled(256):    # or just for a block
+            ...
+        Path.listings.hits, Path.listings.misses
+
+    the directory is stat()ed on every use, and its listing read again
+    if its inode or st_mtime_ns has changed, or if the listing is older
+    than ttl; a directory changed in the last couple of seconds is not
+    cached at all; only the names and types of the entries are kept, so
+    stat() and lstat() on the Paths given are read again each time (from
+    Path.stats when that is on)
+    """
+
+    def __repr__(self):
+        return '<directory listings: %d of %d, ttl %r, %d hits, %d misses>' % (
+                len(self._table), self.size, self.ttl, self.hits, self.misses,
+                )
+
+    def discard(self, dir):
+        "forget the listing of dir, if there is one"
+        with self._lock:
+            self._table.pop(self._key(dir), None)
+
+    def resize(self, size):
+        "keep at most size listings; 0 turns caching off"
+        if size and not hasattr(_os, 'scandir'):
+            raise NotImplementedError('directory listings are only cached with os.scandir')
+        super(_ListingCache, self).resize(size)
+
+    def enabled(self, size=1024, ttl=None):
+        "cache listings within a with block, restoring the previous settings after"
+        return super(_ListingCache, self).enabled(size, ttl)
+
+    def _key(self, dir):
+        dir = base_class(dir)
+        return type(dir), _os.path.abspath(dir)
+
+    def entries(self, dir):
+        "the _ListedEntry list of dir, from the cache if still good"
+        return self._listing(dir)[0]
+
+    def names(self, dir):
+        "the listdir() Paths of dir, from the cache if still good"
+        listing = self._listing(dir)
+        if listing[1] is None:
+            # Paths cannot change, so the list can be shared
+            listing[1] = [Path(entry.name) for entry in listing[0]]
+        return list(listing[1])
+
+    def _listing(self, dir):
+        "[entries, names or None] for dir, read again if needed"
+        # the entries are read from the absolute path they are kept under,
+        # so their stat() still works after a chdir()
+        key = self._key(dir)
+        dir = key[1]
+        st = _os.stat(dir)
+        mtime_ns = getattr(st, 'st_mtime_ns', None)
+        if mtime_ns is None:
+            mtime_ns = int(st.st_mtime * 1000000000)
+        stamp = st.st_dev, st.st_ino, mtime_ns
+        now = _monotonic()
+        table = self._table
+        with self._lock:
+            cached = table.pop(key, None)
+            if cached is not None and cached[0] == stamp and (self.ttl is None or now - cached[1] < self.ttl):
+                table[key] = cached
+                self.hits += 1
+                return cached[2]
+            self.misses += 1
+        entries = _os.scandir(dir)
+        try:
+            listing = [[_ListedEntry(entry) for entry in entries], None]
+        finally:
+            _close(entries)
+        if _time.time() - st.st_mtime >= _LISTING_SETTLE:
+            with self._lock:
+                if self.size:
+                    table[key] = stamp, now, listing
+                    self._trim()
+        return listing
+
+Path.listings = _listings = _ListingCache()
+
+class _ListedEntry(object):
+    """
+    what a cached listing keeps of an os.DirEntry: its name, path, and
+    type; a directory's mtime does not change when one of its files is
+    written to, so stat() is not kept, but read again each time
+    """
+
+    __slots__ = ('name', 'path', '_dir', '_file', '_link', '_inode')
+
+    def __init__(self, entry):
+        self.name = entry.name
+        self.path = entry.path
+        try:
+            self._link = entry.is_symlink()
+        except OSError:
+            self._link = False
+        # followed, as a symlink is by default
+        self._dir = _is_dir(entry)
+        try:
+            self._file = entry.is_file()
+        except OSError:
+            self._file = False
+        # free from the directory itself, except on Windows
+        self._inode = None if _is_win else entry.inode()
+
+    def __repr__(self):
+        return '<%s %r>' % (self.__class__.__name__, self.name)
+
+    def __fspath__(self):
+        return self.path
+
+    def inode(self):
+        if self._inode is None:
+            self._inode = _os.lstat(self.path).st_ino
+        return self._inode
+
+    def is_dir(self, follow_symlinks=True):
+        return self._dir and (follow_symlinks or not self._link)
+
+    def is_file(self, follow_symlinks=True):
+        return self._file and (follow_symlinks or not self._link)
+
+    def is_symlink(self):
+        return self._link
+
+    def stat(self, follow_symlinks=True):
+        if Path.stats.size:
+            return Path.stats.stat(self.path, follow_symlinks)
+        if follow_symlinks:
+            return _os.stat(self.path)
+        return _os.lstat(self.path)
+
+class _StatCache(_ExpiringTable):
+    """
+    bounded, thread-safe LRU cache of stat() and lstat() results for
+    exists(), lexists(), isdir(), isfile(), islink(), stat(), and lstat(),
+    each good for ttl seconds after it is read (None for until discarded);
+    off until given a size:
+
+        Path.stats.resize(4096)             # for the whole process
+        Path.stats.ttl = 0.5
+        ...
+        with Path.stats.enabled(4096):      # or just for a block
+            ...
+        Path.stats.discard(path)            # forget path (and its parent)
+        Path.stats.discard(dir, tree=True)  # ... and everything below dir
+        Path.stats.hits, Path.stats.misses
+
+    one lstat() answers for both stat() and lstat() unless the path is a
+    symlink, and a path that cannot be stat()ed is cached as its error;
+    'dir' and 'dir/' share an entry (the latter only answers for a
+    directory, as with os.stat); a relative path costs an os.getcwd() on
+    every lookup, to find its entry;
+    Path's own file operations discard what they change, but changes made
+    any other way are only seen once ttl has passed (or after discard())
+
+    Path.stats may be replaced by any object with a size, stat(path,
+    follow_symlinks), and discard(path, tree)
+    """
+
+    def __init__(self, size=0, ttl=1.0):
+        super(_StatCache, self).__init__(size, ttl)
+
+    def __repr__(self):
+        return '<stat results: %d of %d, ttl %r, %d hits, %d misses>' % (
+                len(self._table), self.size, self.ttl, self.hits, self.misses,
+                )
+
+    def discard(self, path, tree=False):
+        "forget path and its parent directory, and with tree everything below path"
+        key = self._key(path)
+        parent = _os.path.dirname(key)
+        with self._lock:
+            self._table.pop(key, None)
+            self._table.pop(parent, None)
+            if tree:
+                sep = _os.sep
+                if isinstance(key, bytes) and _py_ver >= (3, 0):
+                    sep = sep.encode('ascii')
+                below = key.rstrip(sep) + sep
+                for other in [k for k in self._table if type(k) is type(key) and k.startswith(below)]:
+                    del self._table[other]
+
+    def enabled(self, size=4096, ttl=1.0):
+        "cache stat results within a with block, restoring the previous settings after"
+        return super(_StatCache, self).enabled(size, ttl)
+
+    def _key(self, path):
+        """
+        path made absolute and without trailing separators (but not
+        normalized, which would be slower than the stat() saved)
+        """
+        if isinstance(path, Path):
+            path = base_class(path)
+        if not _isabs(path):
+            if isinstance(path, bytes) and _py_ver >= (3, 0):
+                path = _os.path.join(_os.getcwdb(), path)
+            else:
+                path = _os.path.join(_os.getcwd(), path)
+        while path[-1:] in _SEPS and len(path) > 1 and path[-2:-1] not in _DRIVE_ENDS:
+            path = path[:-1]
+        return path
+
+    def stat(self, path, follow_symlinks=True):
+        "os.stat(path), or os.lstat(path) if not follow_symlinks, from the cache if still good"
+        key = self._key(path)
+        # a trailing separator follows a symlink, and wants a directory
+        slashed = path[-1:] in _SEPS
+        follow = follow_symlinks or slashed
+        now = _monotonic()
+        table = self._table
+        with self._lock:
+            cached = table.get(key)
+            if cached is not None and (self.ttl is None or now - cached[0] < self.ttl):
+                _lru_touch(table, key)
+                result = cached[1] if not follow or cached[2] is None else cached[2]
+                self.hits += 1
+                return self._result(result, path, slashed)
+            self.misses += 1
+        try:
+            lstat = _os.lstat(key)
+        except OSError:
+            lstat = _sys.exc_info()[1]
+        stat = None
+        if not isinstance(lstat, OSError) and _stat.S_ISLNK(lstat.st_mode):
+            try:
+                stat = _os.stat(key)
+            except OSError:
+                stat = _sys.exc_info()[1]
+        with self._lock:
+            if self.size:
+                table[key] = now, lstat, stat
+                self._trim()
+        return self._result(lstat if not follow or stat is None else stat, path, slashed)
+
+    def _result(self, result, path, slashed):
+        if slashed and not isinstance(result, OSError) and not _stat.S_ISDIR(result.st_mode):
+            raise OSError(_errno.ENOTDIR, _os.strerror(_errno.ENOTDIR), path)
+        if isinstance(result, OSError):
+            # a fresh error each time, so tracebacks do not pile up
+            raise result.__class__(result.errno, result.strerror, path)
+        return result
+
+Path.stats = _StatCache()
+
+if _is_win:
+    _isabs = _os.path.isabs
+    _SEPS = ('/', b'/', '\\', b'\\')
+    # 'c:/' is not 'c:'
+    _DRIVE_ENDS = (':', b':')
+else:
+    def _isabs(path):
+        return path[:1] in ('/', b'/')
+    _SEPS = ('/', b'/')
+    _DRIVE_ENDS = ()
+
+if hasattr(OrderedDict, 'move_to_end'):
+    def _lru_touch(table, key):
+        table.move_to_end(key)
+else:
+    def _lru_touch(table, key):
+        table[key] = table.pop(key)
+
+def _cached_mode(path, follow_symlinks=True):
+    "st_mode of path from Path.stats, or None if it cannot be stat()ed"
+    try:
+        return Path.stats.stat(path, follow_symlinks).st_mode
+    except (OSError, ValueError):
+        return None
+
+def _stats_changed(path, tree=False, parents=False):
+    """
+    tell Path.stats that path (and with tree, everything below it) has
+    changed; with parents, so have all the directories above it
+    """
+    stats = Path.stats
+    if not stats.size:
+        return
+    stats.discard(path, tree)
+    if parents:
+        path = _os.path.abspath(base_class(path))
+        while True:
+            parent = _os.path.dirname(path)
+            if parent == path:
+                break
+            stats.discard(parent)
+            path = parent
+
+class BulkResult(object):
+    """
+    what a bulk operation given workers or an executor did: succeeded
+    holds the Paths it worked on, failed (Path, exception) pairs for the
+    ones it did not; true when nothing failed:
+
+        result = Path.chmod(0o640, files, workers=16)
+        for path, error in result.failed:
+            ...
+    """
+
+    def __init__(self, operation):
+        self.operation = operation
+        self.succeeded = []
+        self.failed = []
+        self.elapsed = 0.0
+
+    def __bool__(self):
+        return not self.failed
+    __nonzero__ = __bool__
+
+    @property
+    def rate(self):
+        "successes per second"
+        if not self.elapsed:
+            return 0.0
+        return len(self.succeeded) / self.elapsed
+
+    def __repr__(self):
+        return '<BulkResult %s: %d succeeded, %d failed in %.3fs>' % (
+                self.operation, len(self.succeeded), len(self.failed), self.elapsed,
+                )
+
+# ioctl(dest_fd, FICLONE, src_fd) shares src's blocks with dest (Linux)
+_FICLONE = 0x40049409
+# copy_file_range() and sendfile() are asked for this much at a time
+_COPY_CHUNK = 1 << 30
+# errors meaning a method cannot be used for a pair of files, rather than
+# that the copy failed
+_COPY_UNSUPPORTED = set(getattr(_errno, name) for name in (
+        'EBADF', 'EINVAL', 'ENOSYS', 'ENOTSUP', 'ENOTTY', 'EOPNOTSUPP', 'EPERM', 'EXDEV', 'ETXTBSY',
+        ) if hasattr(_errno, name))
+
+class _Unsupported(Exception):
+    "a copy method cannot be used for these two files"
+
+class _CopyEngine(object):
+    """
+    copies file data the fastest way that works for each pair of files;
+    on Linux that is the first of a reflink (the FICLONE ioctl),
+    os.copy_file_range, os.sendfile, and plain reads and writes to work,
+    elsewhere it is shutil.copyfile (which uses the platform's own fast
+    copy); a method that fails before copying anything is not tried again
+    between the same two devices; counts says how often each method was
+    used:
+
+        Path.copy(files, dst)
+        Path.copier.counts      # {'clone': 120, 'copy_file_range': 3, ...}
+    """
+
+    if _sys.platform.startswith('linux'):
+        methods = ['clone', 'copy_file_range', 'sendfile', 'read_write']
+        if _fcntl is None:
+            methods.remove('clone')
+        if not hasattr(_os, 'copy_file_range'):
+            methods.remove('copy_file_range')
+        if not hasattr(_os, 'sendfile'):
+            methods.remove('sendfile')
+    else:
+        methods = ['shutil']
+    methods = tuple(methods)
+
+    def __init__(self):
+        self._lock = _threading.Lock()
+        self.counts = dict.fromkeys(self.methods, 0)
+        # (method, source device, destination device)
+        self._unsupported = set()
+
+    def __repr__(self):
+        return '<copy methods: %s>' % ', '.join(['%s %d' % (m, self.counts[m]) for m in self.methods])
+
+    def copy2(self, src, dst):
+        "shutil.copy2(src, dst), with the data copied by copyfile()"
+        if _os.path.isdir(dst):
+            dst = _os.path.join(dst, _os.path.basename(src))
+        self.copyfile(src, dst)
+        _shutil.copystat(src, dst)
+        return dst
+
+    def copyfile(self, src, dst):
+        "copy the data of src to dst as shutil.copyfile does; return the method used"
+        if self.methods == ('shutil', ):
+            _shutil.copyfile(src, dst)
+            return self._used('shutil')
+        if _os.path.exists(dst) and _os.path.samefile(src, dst):
+            raise getattr(_shutil, 'SameFileError', _shutil.Error)('%r and %r are the same file' % (src, dst))
+        for name in (src, dst):
+            try:
+                st = _os.stat(name)
+            except OSError:
+                continue
+            if _stat.S_ISFIFO(st.st_mode):
+                raise getattr(_shutil, 'SpecialFileError', _shutil.Error)('`%s` is a named pipe' % (name, ))
+        with open(src, 'rb') as fsrc:
+            with open(dst, 'wb') as fdst:
+                src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+                src_st = _os.fstat(src_fd)
+                devices = src_st.st_dev, _os.fstat(dst_fd).st_dev
+                # a size of 0 may be a /proc-like file that only reading shows
+                if src_st.st_size and _stat.S_ISREG(src_st.st_mode):
+                    for method in self.methods[:-1]:
+                        key = (method, ) + devices
+                        if key in self._unsupported:
+                            continue
+                        try:
+                            getattr(self, '_' + method)(src_fd, dst_fd)
+                            return self._used(method)
+                        except _Unsupported:
+                            self._unsupported.add(key)
+                _shutil.copyfileobj(fsrc, fdst, 1 << 20)
+                return self._used('read_write')
+
+    def _used(self, method):
+        with self._lock:
+            self.counts[method] += 1
+        return method
+
+    def _clone(self, src_fd, dst_fd):
+        try:
+            _fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+        except (IOError, OSError):
+            if _sys.exc_info()[1].errno in _COPY_UNSUPPORTED:
+                raise _Unsupported()
+            raise
+
+    def _copy_file_range(self, src_fd, dst_fd):
+        self._copy_loop(lambda: _os.copy_file_range(src_fd, dst_fd, _COPY_CHUNK))
+
+    def _sendfile(self, src_fd, dst_fd):
+        # explicit offsets are not needed: both files start at 0 and move on
+        self._copy_loop(lambda: _os.sendfile(dst_fd, src_fd, None, _COPY_CHUNK))
+
+    def _copy_loop(self, copy):
+        "call copy() until it copies nothing, giving up if it copies nothing at all"
+        copied = 0
+        while True:
+            try:
+                count = copy()
+            except OSError:
+                if not copied and _sys.exc_info()[1].errno in _COPY_UNSUPPORTED:
+                    raise _Unsupported()
+                raise
+            if not count:
+                break
+            copied += count
+        if not copied:
+            raise _Unsupported()
+
+Path.copier = _copier = _CopyEngine()
+
+class _Trash(object):
+    """
+    deferred deletion for rmtree() and unlink() with defer=True: the target
+    is renamed into the trash directory given to use() for its file system,
+    and deleted by a background thread; a target on a file system without
+    one is deleted at once, and defer=True before any use() is a ValueError
+
+    at most limit entries wait to be deleted; deferring more blocks until
+    there is room.  use() queues what an earlier run left in the directory
+    (entries named the way the trash names them), and refuses a directory
+    that holds anything else; a trash directory that is removed is not
+    made again, but forgotten until use() is called for it.  pending and peak show how far the trash has
+    grown, and wait() blocks until it is empty again:
+
+        Path.trash.use('/data/.trash')  # at startup; queues what is left
+        Path(scratch).rmtree(defer=True)
+        Path.trash              # <trash: 1 pending (peak 1), 0 deleted, 0 failed>
+        Path.trash.wait()
+    """
+
+    # what the trash renames things to: pid-milliseconds-count
+    _own_name = _re.compile(r'\d+-\d+-\d+$')
+
+    def __init__(self, limit=1024):
+        self.limit = limit
+        self.queued = self.recovered = self.deleted = self.failed = self.peak = 0
+        self.last_error = None
+        self._condition = _threading.Condition()
+        self._queue = deque()
+        self._reserved = 0      # renames under way
+        self._busy = 0          # entries being deleted
+        self._dirs = {}         # st_dev -> trash directory (None once removed)
+        self._thread = None
+        self._count = 0
+        self._token = '%d-%d' % (_os.getpid(), int(_time.time() * 1000))
+
+    def __repr__(self):
+        return '<trash: %d pending (peak %d), %d deleted, %d failed>' % (
+                self.pending, self.peak, self.deleted, self.failed,
+                )
+
+    @property
+    def pending(self):
+        "entries moved into the trash and not yet deleted"
+        return len(self._queue) + self._busy
+
+    def defer(self, target, directory):
+        """
+        move target, which must (or, if not directory, must not) be a
+        directory, into the trash to be deleted in the background; returns
+        False if that cannot be done, so the caller should delete it itself
+        """
+        if not self._dirs:
+            raise ValueError('no trash directory: call Path.trash.use() first')
+        try:
+            st = _os.lstat(target)
+        except OSError:
+            return False
+        if bool(_stat.S_ISDIR(st.st_mode)) != directory:
+            return False
+        trash = self._trash_dir(target, st.st_dev)
+        if trash is None:
+            return False
+        with self._condition:
+            while len(self._queue) + self._busy + self._reserved >= self.limit:
+                self._condition.wait()
+            self._reserved += 1
+            self._count += 1
+            name = '%s-%d' % (self._token, self._count)
+        moved = None
+        try:
+            if isinstance(trash, bytes):
+                name = name.encode('ascii')
+            moved = _os.path.join(trash, name)
+            _os.rename(target, moved)
+        except OSError:
+            moved = None
+            if not _os.path.isdir(trash):
+                # someone removed it; forget it until use() is called again
+                with self._condition:
+                    if self._trash_dir(target, st.st_dev) == trash:
+                        self._dirs[st.st_dev] = None
+        with self._condition:
+            self._reserved -= 1
+            if moved is not None:
+                self._put(moved)
+            self._condition.notify_all()
+        return moved is not None
+
+    def use(self, directory):
+        """
+        make directory (created if need be) the trash for its file system,
+        queueing what an earlier run left in it; a directory holding
+        anything the trash did not put there is refused, so that nothing
+        but trash is ever deleted
+        """
+        directory = _os.path.abspath(directory)
+        try:
+            _os.mkdir(directory, 0o700)
+        except OSError:
+            if _sys.exc_info()[1].errno != _errno.EEXIST:
+                raise
+        st = _os.lstat(directory)
+        if not _stat.S_ISDIR(st.st_mode):
+            raise OSError(_errno.ENOTDIR, 'Not a directory', directory)
+        if not _os.access(directory, W_OK | X_OK):
+            raise OSError(_errno.EACCES, 'Permission denied', directory)
+        leftovers = _os.listdir(directory)
+        for name in leftovers:
+            if isinstance(name, bytes) and _py_ver >= (3, 0):
+                name = name.decode('latin-1')
+            if not self._own_name.match(name):
+                raise OSError(_errno.ENOTEMPTY, 'holds more than trash (%r)' % (name, ), directory)
+        with self._condition:
+            self._dirs[st.st_dev] = directory
+            for leftover in leftovers:
+                self._put(_os.path.join(directory, leftover))
+            self.recovered += len(leftovers)
+
+    def wait(self, timeout=None):
+        "block until the trash is empty, or timeout seconds; True if it is"
+        deadline = None if timeout is None else _monotonic() + timeout
+        with self._condition:
+            while self.pending or self._reserved:
+                if deadline is None:
+                    self._condition.wait()
+                else:
+                    remaining = deadline - _monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._condition.wait(remaining)
+            return True
+
+    def _trash_dir(self, target, dev):
+        trash = self._dirs.get(dev)
+        if trash is not None and _py_ver >= (3, ) and isinstance(trash, bytes) != isinstance(target, bytes):
+            trash = _os.fsencode(trash) if isinstance(target, bytes) else _os.fsdecode(trash)
+        return trash
+
+    def _put(self, path):
+        # called with the condition held
+        self._queue.append(path)
+        self.queued += 1
+        self.peak = max(self.peak, self.pending)
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = _threading.Thread(target=self._run, name='antipathy-trash')
+            self._thread.daemon = True
+            self._thread.start()
+        self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                path = self._queue.popleft()
+                self._busy += 1
+            error = None
+            try:
+                if _stat.S_ISDIR(_os.lstat(path).st_mode):
+                    _shutil.rmtree(path)
+                else:
+                    _os.unlink(path)
+            except EnvironmentError:
+                error = _sys.exc_info()[1]
+                if error.errno == _errno.ENOENT:
+                    # another process got to it first
+                    error = None
+            with self._condition:
+                self._busy -= 1
+                if error is None:
+                    self.deleted += 1
+                else:
+                    self.failed += 1
+                    self.last_error = error
+                self._condition.notify_all()
+
+Path.trash = _trash = _Trash()
+
+def _close(entries):
+    "close an os.scandir() iterator; before Python 3.6 they have no close()"
+    close = getattr(entries, 'close', None)
+    if close is not None:
+        close()
+
+def _dir_kinds(dir):
+    "(name, is a symlink, is a directory) for every entry in dir"
+    if not hasattr(_os, 'scandir'):
+        kinds = []
+        for name in _os.listdir(dir):
+            path = _os.path.join(dir, name)
+            kinds.append((name, _os.path.islink(path), _os.path.isdir(path)))
+        return kinds
+    entries = _os.scandir(dir)
+    try:
+        return [(e.name, e.is_symlink(), _is_dir(e)) for e in entries]
+    finally:
+        _close(entries)
+
+# rmtree() can only work relative to directory descriptors where all of
+# these take them; names are unlinked in chunks of _RMTREE_CHUNK per task, and
+# at most _RMTREE_WINDOW emptied directories (in the whole tree) are held open
+# while their unlinks finish
+_rmtree_by_fd = (
+        ThreadPoolExecutor is not None
+        and getattr(_os, 'scandir', None) in getattr(_os, 'supports_fd', ())
+        and set([_os.open, _os.rmdir, _os.unlink]) <= getattr(_os, 'supports_dir_fd', set())
+        )
+_RMTREE_CHUNK = 256
+_RMTREE_WINDOW = 32
+
+def _rmtree_parallel(path, ignore_errors, onerror, workers, executor):
+    """
+    shutil.rmtree(path, ignore_errors, onerror) by directory descriptor, with
+    the unlinking done workers at a time (or on executor)
+
+    a single thread walks the tree, depth first and without recursion;
+    each directory's files are handed to the pool as it is read, and once
+    its subdirectories are gone it waits its turn behind up to
+    _RMTREE_WINDOW other emptied directories before its unlinks are waited
+    on and it is removed, so the descriptors held open are one per level
+    being walked plus that window
+    """
+    if ignore_errors:
+        def onerror(*args):
+            pass
+    elif onerror is None:
+        def onerror(*args):
+            raise
+    report = onerror
+    lock = _threading.Lock()
+    def onerror(func, name, exc_info):
+        with lock:
+            report(func, name, exc_info)
+    if isinstance(path, bytes):
+        def join(dir, name):
+            return _os.path.join(dir, _os.fsencode(name))
+    else:
+        join = _os.path.join
+    def unlink(fd, dir, names):
+        for name in names:
+            try:
+                _os.unlink(name, dir_fd=fd)
+            except OSError:
+                onerror(_os.unlink, join(dir, name), _sys.exc_info())
+    def settle(running):
+        # a pool task may still be using a descriptor we are about to close
+        for future in running:
+            try:
+                future.result()
+            except Exception:
+                pass
+    def open_dir(dir_fd, name, dir, st):
+        "[dir_fd, name, dir, fd, subdirs, running unlinks] for dir, or None if it cannot be done"
+        try:
+            fd = _os.open(name, _os.O_RDONLY, dir_fd=dir_fd)
+        except OSError:
+            onerror(_os.open, dir, _sys.exc_info())
+            return None
+        try:
+            if _os.path.samestat(st, _os.fstat(fd)):
+                subdirs, running = clear(fd, dir)
+                return [dir_fd, name, dir, fd, subdirs, running]
+            try:
+                raise OSError('Cannot call rmtree on a symbolic link')
+            except OSError:
+                onerror(_os.path.islink, dir, _sys.exc_info())
+        except BaseException:
+            _os.close(fd)
+            raise
+        _os.close(fd)
+    def finish(opened):
+        dir_fd, name, dir, fd, subdirs, running = opened
+        try:
+            for future in running:
+                future.result()
+        finally:
+            settle(running)
+            _os.close(fd)
+        try:
+            _os.rmdir(name, dir_fd=dir_fd)
+        except OSError:
+            onerror(_os.rmdir, dir, _sys.exc_info())
+    def clear(fd, dir):
+        """
+        read dir (open as fd) and start unlinking its files; returns its
+        subdirectories, last first, as (name, lstat) pairs, and the unlinks
+        """
+        try:
+            scan = _os.scandir(fd)
+            try:
+                entries = list(scan)
+            finally:
+                scan.close()
+        except OSError:
+            onerror(_os.scandir, dir, _sys.exc_info())
+            return [], []
+        files, subdirs = [], []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                is_dir = False
+            if not is_dir:
+                files.append(entry.name)
+                continue
+            try:
+                subdirs.append((entry.name, entry.stat(follow_symlinks=False)))
+            except OSError:
+                onerror(_os.lstat, join(dir, entry.name), _sys.exc_info())
+        subdirs.reverse()
+        running = [
+                submit(unlink, fd, dir, files[i:i+_RMTREE_CHUNK])
+                for i in range(0, len(files), _RMTREE_CHUNK)
+                ]
+        return subdirs, running
+    try:
+        st = _os.lstat(path)
+    except OSError:
+        onerror(_os.lstat, path, _sys.exc_info())
+        return
+    if executor is None:
+        pool = executor = ThreadPoolExecutor(max_workers=workers)
+    else:
+        pool = None
+    submit = executor.submit
+    # walked holds the directories still being walked, from the top down,
+    # and emptied the ones whose subdirectories are all gone, oldest first;
+    # a directory is only emptied after everything below it, so finishing
+    # them in order removes children before their parents
+    walked, emptied = [], []
+    try:
+        try:
+            opened = open_dir(None, path, path, st)
+            if opened is not None:
+                walked.append(opened)
+            while walked:
+                opened = walked[-1]
+                dir_fd, name, dir, fd, subdirs, running = opened
+                if subdirs:
+                    name, st = subdirs.pop()
+                    opened = open_dir(fd, name, join(dir, name), st)
+                    if opened is not None:
+                        walked.append(opened)
+                    continue
+                emptied.append(walked.pop())
+                if len(emptied) > _RMTREE_WINDOW:
+                    finish(emptied.pop(0))
+            while emptied:
+                finish(emptied.pop(0))
+        except BaseException:
+            for opened in walked + emptied:
+                settle(opened[5])
+                _os.close(opened[3])
+            raise
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+# touch() opens files the way touch(1) does, so that FIFOs and terminals are
+# safe to open, and sets their times through the descriptor where it can
+_TOUCH_FLAGS = _os.O_WRONLY | _os.O_CREAT | getattr(_os, 'O_NONBLOCK', 0) | getattr(_os, 'O_NOCTTY', 0)
+_utime_fd = _os.utime in getattr(_os, 'supports_fd', ())
+
+def _touch(path, times, no_create):
+    """
+    create path if need be (unless no_create) and set its times: one
+    os.open(O_CREAT) and one os.utime() on the descriptor, with os.utime()
+    on the name for what cannot be opened for writing (directories, files
+    without write permission); a time left as None in times is kept
+    """
+    partial = times is not None and None in times
+    fd = None
+    if no_create:
+        try:
+            _os.utime(path, _touch_times(_os.stat(path), times) if partial else times)
+        except OSError:
+            if _sys.exc_info()[1].errno != _errno.ENOENT:
+                raise
+            return
+        _stats_changed(path)
+        return
+    try:
+        fd = _os.open(path, _TOUCH_FLAGS, 0o666)
+    except OSError:
+        open_error = _sys.exc_info()[1]
+        if open_error.errno in (_errno.ENOENT, _errno.ENOTDIR):
+            raise
+    try:
+        if partial:
+            times = _touch_times(_os.stat(path) if fd is None else _os.fstat(fd), times)
+        if fd is not None and _utime_fd:
+            _os.utime(fd, times)
+        else:
+            try:
+                _os.utime(path, times)
+            except OSError:
+                if fd is None:
+                    # why it could not be opened says more than ENOENT here
+                    raise open_error
+                raise
+    finally:
+        if fd is not None:
+            _os.close(fd)
+    _stats_changed(path)
+
+def _touch_times(st, times):
+    "times with any None replaced from st"
+    atime, mtime = times
+    if atime is None:
+        atime = st.st_atime
+    if mtime is None:
+        mtime = st.st_mtime
+    return atime, mtime
+
+def _move_bulk(sources, dst, workers, executor):
+    """
+    move sources to dst, returning a BulkResult
+
+    dst is stat()ed once for the whole batch: if it is a directory the
+    sources go into it (one already there by that name is an error, as with
+    shutil.move, found with one lstat() per source), otherwise there can be
+    only one source.  Sources on dst's
+    device are renamed one after the other; the rest are copied and then
+    removed, workers at a time (or on executor)
+    """
+    start = _time.time()
+    sources = [Path(s) for s in sources]
+    try:
+        st = _os.stat(dst)
+    except OSError:
+        st = None
+    if st is not None and _stat.S_ISDIR(st.st_mode):
+        dev = st.st_dev
+        into = True
+        targets = [dst/_os.path.basename(s.rstrip(s._SLASH)) for s in sources]
+    elif len(sources) == 1:
+        dev = _os.stat(_os.path.dirname(_os.path.abspath(dst))).st_dev
+        into = False
+        targets = [dst]
+    else:
+        raise OSError(_errno.ENOTDIR, 'Not a directory: %r' % (dst, ))
+    result = BulkResult('move')
+    copies = OrderedDict()
+    for src, target in zip(sources, targets):
+        try:
+            if into and _os.path.lexists(target):
+                raise _shutil.Error("Destination path '%s' already exists" % (target, ))
+            if _os.lstat(src).st_dev == dev:
+                try:
+                    _os.rename(src, target)
+                except OSError:
+                    if _sys.exc_info()[1].errno != _errno.EXDEV:
+                        raise
+                else:
+                    _stats_changed(src, tree=True)
+                    _stats_changed(target, tree=True)
+                    result.succeeded.append(src)
+                    continue
+            copies[src] = target
+        except EnvironmentError:
+            result.failed.append((src, _sys.exc_info()[1]))
+    def copy_over(src):
+        target = copies[src]
+        mode = _os.lstat(src).st_mode
+        if _stat.S_ISLNK(mode):
+            _os.symlink(_os.readlink(src), target)
+            _os.unlink(src)
+        elif _stat.S_ISDIR(mode):
+            src.copytree(target, True)
+            _shutil.rmtree(src)
+        else:
+            _copier.copy2(src, target)
+            _os.unlink(src)
+        _stats_changed(src, tree=True)
+        _stats_changed(target, tree=True)
+    if copies:
+        copied = Path._bulk('move', copy_over, list(copies), workers, executor)
+        result.succeeded.extend(copied.succeeded)
+        result.failed.extend(copied.failed)
+    result.elapsed = _time.time() - start
+    return result
+
+def _makedirs(path, mode, owner, known=None):
+    """
+    make path and any missing directories above it; mkdir is tried on path
+    first, and only on ENOENT on its parent, and so on up (stopping at any
+    directory in known); returns the directories made (an existing path is
+    not an error)
+    """
+    if mode is None:
+        mode = 0o777
+    made = []
+    def make(path):
+        # the error, if any, that is not EEXIST
+        try:
+            _os.mkdir(path, mode)
+        except OSError:
+            error = _sys.exc_info()[1]
+            if error.errno != _errno.EEXIST:
+                return error
+            return None
+        if owner is not None:
+            _os.chown(path, *owner)
+        _stats_changed(path)
+        made.append(path)
+    target = path
+    climbed = []
+    while known is None or path not in known:
+        error = make(path)
+        parent = _os.path.dirname(path)
+        if error is not None and error.errno == _errno.ENOENT and parent and parent != path:
+            climbed.append(path)
+            path = parent
+            continue
+        if error is not None:
+            raise error
+        break
+    for path in reversed(climbed):
+        error = make(path)
+        if error is not None and error.errno == _errno.ENOENT and known is not None:
+            # a directory in known has gone; look again without it
+            known.discard(_os.path.dirname(path))
+            return made + _makedirs(target, mode, owner)
+        if error is not None:
+            raise error
+    if known is not None:
+        known.update(climbed)
+    return made
+
+def _makedirs_batch(targets, mode, owner, known=None):
+    """
+    make every directory in targets and above them; the paths are gathered
+    into a tree first, the single chain at the top of each tree is made by
+    _makedirs(), and below that each directory not in known gets one
+    mkdir (should one in known have gone, ENOENT from a new directory below
+    it puts it back); only directories go into known, so a file found in
+    the way is looked at again next time; returns the directories made
+    """
+    if mode is None:
+        mode = 0o777
+    if known is None:
+        known = set()
+    # directory -> its subdirectories that were asked for
+    children = OrderedDict()
+    roots = []
+    for target in targets:
+        path, child = target, None
+        while True:
+            seen = path in children
+            if not seen:
+                children[path] = []
+            if child is not None:
+                children[path].append(child)
+            if seen:
+                break
+            parent = _os.path.dirname(path)
+            if not parent or parent == path:
+                roots.append(path)
+                break
+            path, child = parent, path
+    made = []
+    def make(dir, fresh):
+        # dir exists; fresh if it was just made, so it has no subdirectories
+        for child in children[dir]:
+            if not fresh and child in known:
+                make(child, False)
+                continue
+            try:
+                _os.mkdir(child, mode)
+            except OSError:
+                error = _sys.exc_info()[1]
+                if error.errno == _errno.ENOENT:
+                    # dir was in known, but is gone now
+                    known.discard(dir)
+                    made.extend(_makedirs(child, mode, owner))
+                elif error.errno != _errno.EEXIST:
+                    raise
+                elif not _os.path.isdir(child):
+                    # a file, say; whatever is below it will fail
+                    make(child, False)
+                    continue
+                created = False
+            else:
+                if owner is not None:
+                    _os.chown(child, *owner)
+                _stats_changed(child)
+                made.append(child)
+                created = True
+            known.add(child)
+            make(child, created)
+    for root in roots:
+        dir = root
+        while len(children[dir]) == 1:
+            dir = children[dir][0]
+        top = _makedirs(dir, mode, owner, known)
+        made.extend(top)
+        fresh = top[-1:] == [dir]
+        if fresh or dir in known or _os.path.isdir(dir):
+            known.add(dir)
+        make(dir, fresh)
+    return made
+
+def _scandir(dir):
+    "os.scandir(dir), or its cached listing when Path.listings is on"
+    if _listings.size:
+        return _listings.entries(dir)
+    return _os.scandir(dir)
+
+def _iterdir(cls, prefix, dir, accept):
+    "the generator behind iterdir(): a cls Path of prefix + name for each accepted entry of dir"
+    entries = _scandir(dir)
+    try:
+        for entry in entries:
+            if accept is None or accept(entry):
+                yield cls._from_entry(prefix, entry)
+    finally:
+        _close(entries)
+
+def _listdir(dir):
+    "listdir() of dir, from Path.listings when it is on"
+    if _listings.size:
+        return _listings.names(dir)
+    return [Path(p) for p in _os.listdir(dir)]
+
+
+# kinds of compiled glob segments; _END marks where a pattern is complete
+_LITERAL, _WILDCARD, _RECURSIVE, _END = range(4)
+_glob_magic = _re.compile('[*?[]')
+_glob_segments = {}
+_GLOB_CACHE_MAX = 256
+
+# how a completed pattern matches: anything, directories only, or
+# directories only and given with a trailing slash
+_ANY, _DIR, _DIR_SLASH = range(3)
+
+def _glob_text(pattern):
+    "pattern as text, bytes being decoded one byte per character"
+    if isinstance(pattern, bytes) and _py_ver >= (3, 0):
+        return pattern.decode('latin-1')
+    return pattern
+
+def _glob_literal(pattern):
+    "True if pattern can only match itself, just as it is written"
+    text = _glob_text(pattern)
+    return (
+            _glob_magic.search(text) is None
+            and ('{' not in text or not _glob_braces(text))
+            and '//' not in text
+            and not text.endswith('/')
+            )
+
+def _glob_braces(text):
+    """
+    the {a,b,...} groups in text, as lists of the offsets of the opening
+    brace, the separating commas, and the closing brace; braces inside
+    [...], unclosed braces, and braces without a comma are ordinary text
+    """
+    groups = []
+    stack = []
+    i, n = 0, len(text)
+    while i < n:
+        c = text[i]
+        if c == '[':
+            j = i + 1
+            if j < n and text[j] == '!':
+                j += 1
+            if j < n and text[j] == ']':
+                j += 1
+            while j < n and text[j] != ']':
+                j += 1
+            if j < n:
+                # skip the whole class
+                i = j
+        elif c == '{':
+            stack.append([i])
+        elif c == ',' and stack:
+            stack[-1].append(i)
+        elif c == '}' and stack:
+            group = stack.pop()
+            if len(group) > 1:
+                group.append(i)
+                groups.append(group)
+        i += 1
+    groups.sort()
+    return groups
+
+def _glob_translate(text):
+    "fnmatch.translate(text) without its anchoring"
+    regex = _fnmatch.translate(text)
+    for head, tail in (('(?s:', ')\\Z'), ('', '\\Z(?ms)')):
+        if regex.startswith(head) and regex.endswith(tail):
+            return regex[len(head):len(regex)-len(tail)]
+    raise ValueError('unexpected translation of %r: %r' % (text, regex))
+
+def _brace_alternatives(text, expand=None):
+    """
+    list of the texts text stands for once its {a,b,...} groups are
+    expanded -- only the groups expand(text, group) is true for, if given
+    """
+    for group in _glob_braces(text):
+        if expand is None or expand(text, group):
+            break
+    else:
+        return [text]
+    head, tail = text[:group[0]], text[group[-1]+1:]
+    expanded = []
+    for alt_start, alt_end in zip(group, group[1:]):
+        expanded.extend(_brace_alternatives(head + text[alt_start+1:alt_end] + tail, expand))
+    return expanded
+
+def _brace_expand(pattern):
+    """
+    list of the patterns pattern stands for once its {a,b,...} groups that
+    hold a '/' are expanded; groups within one segment are left for
+    _glob_segment(), except that the '.' and '..' alternatives of a segment
+    are split off as literal segments, as no directory listing has them
+    """
+    is_bytes = isinstance(pattern, bytes) and _py_ver >= (3, 0)
+    text = _glob_text(pattern)
+    if '{' not in text:
+        return [pattern]
+    expanded = []
+    for text in _brace_alternatives(text, lambda text, group: '/' in text[group[0]:group[-1]]):
+        expanded.extend(_dot_expand(text.split('/')))
+    if is_bytes:
+        expanded = [p.encode('latin-1') for p in expanded]
+    return expanded
+
+def _native_glob(pattern):
+    "glob.glob(), with the {a,b,...} groups of pattern expanded first"
+    is_bytes = isinstance(pattern, bytes) and _py_ver >= (3, 0)
+    text = _glob_text(pattern)
+    found = []
+    seen = set()
+    for text in _brace_alternatives(text):
+        if is_bytes:
+            text = text.encode('latin-1')
+        for p in native_glob(text):
+            if p not in seen:
+                seen.add(p)
+                found.append(Path(p))
+    return found
+
+def _dot_expand(segments):
+    "the patterns segments stand for with '.' and '..' alternatives split off"
+    for i, segment in enumerate(segments):
+        if '{' in segment:
+            dots = [a for a in _brace_alternatives(segment) if a in ('.', '..')]
+            if dots:
+                break
+    else:
+        return ['/'.join(segments)]
+    head = segments[:i]
+    expanded = []
+    for tail in _dot_expand(segments[i+1:]) if i+1 < len(segments) else [None]:
+        for segment in [segments[i]] + dots:
+            expanded.append('/'.join(head + [segment] + ([tail] if tail is not None else [])))
+    return expanded
+
+def _glob_segment(cls, segment):
+    """
+    compile one pattern segment into ((kind, matcher, extra), prefix): a
+    literal segment is (_LITERAL, normcased name, name), a wildcard one is
+    (_WILDCARD, regex match method, whether a leading '.' may match), and
+    '**' is (_RECURSIVE, None, None); prefix is the normcased part of the
+    segment before its first wildcard or brace
+
+    a {a,b,...} group becomes an alternation in the segment's one regex
+    """
+    key = cls, segment
+    try:
+        return _glob_segments[key]
+    except KeyError:
+        pass
+    is_bytes = isinstance(segment, bytes) and _py_ver >= (3, 0)
+    text = _glob_text(segment)
+    groups = _glob_braces(text)
+    magic = _glob_magic.search(text)
+    literal_end = len(text)
+    if magic is not None:
+        literal_end = magic.start()
+    if groups:
+        literal_end = min(literal_end, groups[0][0])
+    prefix = _os.path.normcase(segment[:literal_end])
+    if segment == cls._STAR * 2:
+        compiled = _RECURSIVE, None, None
+    elif magic is None and not groups:
+        compiled = _LITERAL, _os.path.normcase(segment), segment
+    else:
+        marks = {}
+        for group in groups:
+            marks[group[0]] = '(?:'
+            for comma in group[1:-1]:
+                marks[comma] = '|'
+            marks[group[-1]] = ')'
+        # a leading '.' may be matched if the segment, or one of the
+        # alternatives it starts with, starts with one -- and then only by
+        # those alternatives
+        dotted = text[:1] == '.'
+        if groups and groups[0][0] == 0:
+            starts = groups[0][:-1]
+            if any(text[i+1:i+2] == '.' for i in starts):
+                dotted = True
+                for i in starts:
+                    if text[i+1:i+2] != '.':
+                        marks[i] += '(?!\\.)'
+        pieces = []
+        run_start = 0
+        for offset in sorted(marks):
+            if offset > run_start:
+                pieces.append(_glob_translate(text[run_start:offset]))
+            pieces.append(marks[offset])
+            run_start = offset + 1
+        if run_start < len(text):
+            pieces.append(_glob_translate(text[run_start:]))
+        regex = '(?s:%s)\\Z' % ''.join(pieces)
+        if is_bytes:
+            regex = regex.encode('latin-1')
+        regex = _re.compile(regex, _re.IGNORECASE if _is_win else 0)
+        compiled = _WILDCARD, regex.match, dotted
+    if len(_glob_segments) >= _GLOB_CACHE_MAX:
+        _glob_segments.clear()
+    _glob_segments[key] = compiled, prefix
+    return compiled, prefix
+
+def _is_dir(entry, follow_symlinks=True):
+    "entry.is_dir(), with errors meaning 'no'"
+    try:
+        return entry.is_dir(follow_symlinks=follow_symlinks)
+    except OSError:
+        return False
+
+
+class GlobPattern(object):
+    """
+    one or more glob patterns compiled into one matcher per path segment,
+    for matching more than once or in more than one directory:
+
+        logs = GlobPattern('**/*.log')
+        for path in logs.iglob('/var/log'):
+            ...
+        old_logs = logs.glob('/srv/app')
+
+        cleanup = GlobPattern('*.tmp', '*.bak', 'core.*')
+        cleanup.glob(spool)     # spool is listed once, not three times
+
+    '*', '?', and '[...]' match within a segment, but not a leading '.'
+    unless the segment starts with one; a '**' segment matches any number
+    of directories (symlinks are not followed); directories are listed
+    only when a wildcard segment needs them, literal segments are looked
+    up directly; a trailing slash matches directories only
+
+    '{a,b,...}' matches any of its (possibly nested) alternatives; within a
+    segment it becomes part of the segment's one matcher, so '*.{c,h}' lists
+    a directory once, and a group spanning segments ('{src/*.c,include}')
+    stands for one pattern per alternative; a brace group without a comma,
+    such as '{a}', is matched literally
+
+    every directory is listed once however many patterns need it, and a
+    Path matched by several patterns is only given once
+    """
+
+    def __init__(self, *patterns):
+        if not patterns:
+            raise TypeError('at least one pattern is needed')
+        patterns = [Path(p) for p in patterns]
+        cls = patterns[0].__class__
+        if not all_equal(patterns, test=lambda p: p.__class__ is cls):
+            raise TypeError('invalid pattern types: %r' % ([type(p) for p in patterns], ))
+        slash = cls._SLASH
+        if cls._SYS_SEP != slash:
+            patterns = [cls(cls.data_type.replace(p, cls._SYS_SEP, slash)) for p in patterns]
+        self.patterns = tuple(patterns)
+        self._cls = cls
+        # the segments of all the patterns, one after the other, each pattern
+        # followed by an _END; a position is an index into this list
+        segments = []
+        prefixes = []
+        # start (a volume or root, or '' for relative patterns): the
+        # positions of the patterns beginning there
+        self._starts = OrderedDict()
+        for number, pattern in enumerate(patterns):
+            for pattern in _brace_expand(pattern):
+                pattern = cls(pattern)
+                vol_end = pattern._split()[0]
+                start, rest = pattern[:vol_end], pattern[vol_end:]
+                if rest[:1] == slash:
+                    start += slash
+                    rest = rest.lstrip(slash)
+                self._starts.setdefault(start, []).append(len(segments))
+                dir_only = rest[-1:] == slash
+                rest = rest.rstrip(slash)
+                if rest:
+                    for segment in rest.split(slash):
+                        if not segment:
+                            # repeated slashes
+                            continue
+                        compiled, prefix = _glob_segment(cls, segment)
+                        if compiled[0] is _RECURSIVE and segments and segments[-1][0] is _RECURSIVE:
+                            # '**/**' is the same as '**'
+                            continue
+                        segments.append(compiled)
+                        prefixes.append(prefix)
+                segments.append((_END, number, dir_only))
+                prefixes.append(None)
+        self._segments = segments
+        # the literal start of each wildcard segment, for _plan()
+        self._prefixes = prefixes
+        # memos for _state() and _plan()
+        self._states = {}
+        self._plans = {}
+
+    def __repr__(self):
+        return 'GlobPattern(%s)' % ', '.join([repr(p.data_type(p)) for p in self.patterns])
+
+    def glob(self, dir=None):
+        """
+        list of the matching Paths (relative patterns are looked for in dir),
+        in pattern order: those of the first pattern, then those of the
+        second, etc.
+        """
+        found = list(self._search_all(dir))
+        if len(self.patterns) > 1:
+            found.sort(key=lambda match: match[0][0])
+        return [path for numbers, path in found]
+
+    def iglob(self, dir=None):
+        """
+        generate the matching Paths (relative patterns are looked for in dir),
+        in the order they are found
+        """
+        for numbers, path in self._search_all(dir):
+            yield path
+
+    def _search_all(self, dir=None):
+        "generate (pattern numbers, Path) for every match"
+        for start, positions in self._starts.items():
+            if not start and dir:
+                dir = Path(dir)
+                start = dir.data_type.rstrip(dir, dir._SLASH) + dir._SLASH
+            for match in self._search(start, positions):
+                yield match
+
+    def _state(self, found):
+        """
+        (positions, match, numbers, dir_numbers) for a path whose last
+        component took the patterns to the positions in found: positions
+        adds those reachable by a '**' matching no directories, less the
+        completed ones (None when nothing is left to match below the path);
+        match is None, or how the path matched (_ANY, _DIR, or _DIR_SLASH);
+        numbers are the patterns that matched it, and dir_numbers those
+        that did if it is a directory
+        """
+        key = frozenset(found)
+        try:
+            return self._states[key]
+        except KeyError:
+            pass
+        segments = self._segments
+        positions = set()
+        for i in found:
+            positions.add(i)
+            while segments[i][0] is _RECURSIVE:
+                i += 1
+                positions.add(i)
+        match = None
+        numbers = []
+        dir_numbers = []
+        for i in sorted(positions):
+            kind, number, dir_only = segments[i]
+            if kind is not _END:
+                continue
+            positions.discard(i)
+            dir_numbers.append(number)
+            if dir_only:
+                how = _DIR_SLASH
+            elif i not in found:
+                # '**' matching no directories at all only matches a directory
+                how = _DIR
+            else:
+                how = _ANY
+                numbers.append(number)
+            if match is None or how < match:
+                match = how
+        if match is not None and match is not _ANY:
+            numbers = dir_numbers
+        state = self._states[key] = frozenset(positions) or None, match, tuple(numbers), tuple(dir_numbers)
+        return state
+
+    def _plan(self, positions):
+        """
+        (literals, names, prefixes, recursive) for a directory: literal names
+        to look up directly, with the state they lead to; and what to test
+        the directory's entries against, if it has to be listed: names maps
+        literal names to their positions, prefixes is [(length, {literal
+        prefix: [(position, match, dotted), ...]}), ...] for the wildcard
+        segments, and recursive the positions of '**' segments
+
+        literals are only looked up directly when nothing else needs the
+        directory listed ('.' and '..' are never listed); grouping wildcard
+        segments by their literal prefix means an entry is only tested
+        against the segments it could match
+        """
+        try:
+            return self._plans[positions]
+        except KeyError:
+            pass
+        cls = self._cls
+        segments = self._segments
+        all_literal = all(segments[i][0] is _LITERAL for i in positions)
+        literals = OrderedDict()
+        names = {}
+        prefixes = {}
+        recursive = []
+        for i in sorted(positions):
+            kind, matcher, extra = segments[i]
+            if kind is _LITERAL and (all_literal or matcher in (cls._CUR_DIR, cls._PREV_DIR)):
+                literals.setdefault(extra, set()).add(i + 1)
+            elif kind is _LITERAL:
+                names.setdefault(matcher, []).append(i)
+            elif kind is _WILDCARD:
+                prefix = self._prefixes[i]
+                prefixes.setdefault(len(prefix), {}).setdefault(prefix, []).append((i, matcher, extra))
+            else:
+                recursive.append(i)
+        plan = self._plans[positions] = (
+                [(name, self._state(found)) for name, found in literals.items()],
+                names,
+                sorted(prefixes.items()),
+                recursive,
+                )
+        return plan
+
+    def _search(self, start, positions):
+        cls = self._cls
+        segments = self._segments
+        slash, dot = cls._SLASH, cls._DOT
+        positions, match, numbers, dir_numbers = self._state(positions)
+        if match is not None and start and _os.path.isdir(start):
+            yield dir_numbers, cls(start)
+        # (directory, positions): the directory (empty, or ending with a
+        # slash) and the segments that could match its entries
+        pending = [(start, positions)]
+        while pending:
+            prefix, positions = pending.pop()
+            if positions is None:
+                continue
+            literals, names, prefixes, recursive = self._plan(positions)
+            for name, state in literals:
+                positions, match, numbers, dir_numbers = state
+                path = prefix + name
+                if match is _ANY:
+                    if numbers != dir_numbers and _os.path.isdir(path):
+                        yield dir_numbers, cls(path)
+                    elif _os.path.lexists(path):
+                        yield numbers, cls(path)
+                elif match is not None and _os.path.isdir(path):
+                    yield dir_numbers, cls(path + slash if match is _DIR_SLASH else path)
+                if positions is not None and _os.path.isdir(path):
+                    pending.append((path + slash, positions))
+            if not (names or prefixes or recursive):
+                continue
+            single = None
+            if not names and not recursive and len(prefixes) == 1 and len(prefixes[0][1]) == 1:
+                candidates = list(prefixes[0][1].values())[0]
+                if len(candidates) == 1:
+                    # the usual case: one wildcard segment to test
+                    i, single, dotted = candidates[0]
+                    single_state = self._state([i + 1])
+            try:
+                entries = _scandir(prefix or cls._CUR_DIR)
+            except OSError:
+                continue
+            try:
+                for entry in entries:
+                    name = entry.name
+                    hidden = name[:1] == dot
+                    if single is not None:
+                        if hidden and not dotted or not single(name):
+                            continue
+                        state = single_state
+                    else:
+                        if _is_win:
+                            name = _os.path.normcase(name)
+                        found = []
+                        for i in names.get(name, ()):
+                            found.append(i + 1)
+                        for length, candidates in prefixes:
+                            for i, matcher, dotted in candidates.get(name[:length], ()):
+                                if (dotted or not hidden) and matcher(name):
+                                    found.append(i + 1)
+                        if recursive and not hidden:
+                            real_dir = _is_dir(entry, follow_symlinks=False)
+                            for i in recursive:
+                                if real_dir:
+                                    found.append(i)
+                                elif segments[i + 1][0] is _END:
+                                    found.append(i + 1)
+                        if not found:
+                            continue
+                        state = self._state(found)
+                    positions, match, numbers, dir_numbers = state
+                    is_dir = None
+                    if match is _ANY:
+                        if numbers != dir_numbers:
+                            # some patterns only match it as a directory
+                            is_dir = _is_dir(entry)
+                            if is_dir:
+                                numbers = dir_numbers
+                        yield numbers, cls._from_entry(prefix, entry)
+                    elif match is not None:
+                        is_dir = _is_dir(entry)
+                        if is_dir and match is _DIR_SLASH:
+                            yield dir_numbers, cls(prefix + entry.name + slash)
+                        elif is_dir:
+                            yield dir_numbers, cls._from_entry(prefix, entry)
+                    if positions is not None:
+                        if is_dir is None:
+                            is_dir = _is_dir(entry)
+                        if is_dir:
+                            pending.append((prefix + entry.name + slash, positions))
+            except OSError:
+                continue
+            finally:
+                _close(entries)
+
+
 def base_class(*paths):
     result = []
     for p in paths:
@@ -1,3 +1,5 @@
+import errno
+import inspect
 import os
 import unittest
 import antipathy
@@ -5,8 +7,17 @@ import shutil
 import sys
 import tempfile
 import time
-from antipathy.path import Path, _is_win as is_win, _py_ver as py_ver, unicode, R_OK, X_OK, ospath
+from antipathy.path import Path, GlobPattern, _is_win as is_win, _py_ver as py_ver, unicode, R_OK, X_OK, ospath
+from antipathy.path import _rmtree_by_fd as rmtree_by_fd
 from datetime import datetime
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    ThreadPoolExecutor = None
+try:
+    import resource
+except ImportError:
+    resource = None
 
 _skip = object()
 def not_implemented(func):
@@ -282,6 +293,9 @@ class TestPathBasics(TestCase):
 
     def test_errors(self):
         "check errors"
+        self.assertRaises(ValueError, Path, '//machine')
+        self.assertRaises(TypeError, Path, 7)
+        self.assertRaises(TypeError, Path, None)
         self.assertRaises(ValueError, Path('/backups/').__div__, Path('//machine/share/temp/'))
         self.assertRaises(ValueError, Path('/backups/file1').__div__, Path('//machine/share/temp/'))
         self.assertRaises(ValueError, Path('/../backups/').__mul__, Path('temp/'))
@@ -342,6 +356,89 @@ class TestPathBasics(TestCase):
                 self.assertEqual(p.ext,  ext, "failed on iter %d --> %r != %r" % (enum, p.ext, ext))
                 enum += 1
 
+    def test_components(self):
+        "check components of components"
+        p = Path('/temp/place/somefile.tar.gz')
+        self.assertEqual(p.filename.base, 'somefile.tar')
+        self.assertEqual(p.filename.ext, '.gz')
+        self.assertEqual(p.filename.dirs, '')
+        self.assertEqual(p.base.ext, '.tar')
+        self.assertEqual(p.ext.filename, '.gz')
+        self.assertEqual(p.ext.base, '')
+        self.assertEqual(p.parent.filename, 'place')
+        self.assertEqual(p.parent.parent, '/temp')
+        self.assertEqual(p.dirs.filename, 'place')
+        self.assertEqual(p.vol.filename, '')
+        self.assertEqual(Path('/temp/somefile.').ext.dirs, '.')
+        self.assertEqual(Path('//machine/share/temp').vol.dirs, '')
+        self.assertEqual(Path('//machine/share/temp').vol.vol, '//machine/share')
+        self.assertEqual(Path(b'/temp/place/somefile.tar.gz').suffixes, [b'tar', b'gz'])
+        for q in (p.filename, p.ext, p.vol, p.parent, p.base) + tuple(p.suffixes):
+            self.assertTrue(isinstance(q, Path))
+
+    def test_interned(self):
+        "check interning of repeated paths"
+        interned = Path.interned
+        self.assertEqual(interned.size, 0)
+        self.assertFalse(Path('/srv/data/') is Path('/srv/data/'))
+        try:
+            interned.resize(10)
+            first = Path('/srv/data/')
+            self.assertTrue(Path('/srv/data/') is first)
+            self.assertEqual((interned.hits, interned.misses), (1, 1))
+            self.assertTrue(Path('/srv') / 'data/' is first)
+            if py_ver >= (3, 0):
+                self.assertFalse(Path(b'/srv/data/') is first)
+            else:
+                # b'' and '' are the same type, so stand in another path
+                Path('/srv/extra/')
+            self.assertEqual(len(interned), 4)
+            interned.resize(2)
+            self.assertEqual(len(interned), 2)
+            Path('/srv/other/')
+            self.assertEqual(len(interned), 2)
+            self.assertFalse(Path('/srv/data/') is first)
+            self.assertRaises(ValueError, Path, '//machine')
+            self.assertRaises(ValueError, interned.resize, -1)
+            interned.clear()
+            self.assertEqual((len(interned), interned.hits, interned.misses), (0, 0, 0))
+        finally:
+            interned.resize(0)
+            interned.clear()
+        self.assertFalse(Path('/srv/data/') is Path('/srv/data/'))
+
+    def test_elements(self):
+        "check path elements"
+        for convert in (unicode, lambda s: s.encode('ascii')):
+            p = Path(convert('/temp/place/somefile.abc'))
+            self.assertEqual(p.elements, [convert(e) for e in ('/', 'temp', 'place', 'somefile.abc')])
+            self.assertEqual(p.dir_elements, [convert(e) for e in ('/', 'temp', 'place')])
+            self.assertEqual(list(p.iter_all()), p.elements)
+            self.assertEqual(list(p.iter_dirs()), p.dir_elements)
+            self.assertEqual(p.elements[-1].ext, convert('.abc'))
+            self.assertTrue(all(isinstance(e, Path) for e in p.elements))
+            # same Paths every time, but a fresh list
+            self.assertTrue(all(a is b for a, b in zip(p.elements, p.iter_all())))
+            self.assertFalse(p.elements is p.elements)
+            p = Path(convert('//machine/share/temp/'))
+            self.assertEqual(p.elements, [convert(e) for e in ('//machine/share', '/', 'temp')])
+            self.assertEqual(p.dir_elements, [convert(e) for e in ('/', 'temp')])
+            self.assertEqual(Path(convert('')).elements, [])
+
+    def test_pickle(self):
+        "check pickling and copying"
+        import copy, pickle
+        for p in (Path('/temp/place/somefile.abc.xyz'), Path(b'/temp/place/somefile.abc.xyz')):
+            for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+                q = pickle.loads(pickle.dumps(p, protocol))
+                self.assertEqual(q, p)
+                self.assertTrue(type(q) is type(p))
+                self.assertEqual(q.ext, p.ext)
+            self.assertEqual(copy.copy(p).dirs, p.dirs)
+        # only uPath has __slots__ (a bytes subclass cannot), and on Python 2
+        # a plain literal makes a bPath
+        self.assertFalse(hasattr(Path(unicode('/temp/place/')), '__dict__'))
+
     def test_os_path_join(self):
         "check os.path.join"
         if is_win:
@@ -405,6 +502,38 @@ class TestPathBasics(TestCase):
             start *= add
             self.assertEqual(start, Path(result), "%r * %r (%s) != %r" % (initial, add, start, Path(result)))
 
+    def test_normpath(self):
+        "check single path normalizing"
+        test_data = (
+            ('', ''),
+            ('/', '/'),
+            ('.', '.'),
+            ('./', './'),
+            ('a/..', '.'),
+            ('a/../x', 'x'),
+            ('a//b', 'a/b'),
+            ('a/./b/.', 'a/b'),
+            ('a/b/../../..', '..'),
+            ('../x', '../x'),
+            ('/temp/this/./.tar', '/temp/this/.tar'),
+            ('/temp/this/../', '/temp/'),
+            ('/temp/this/..', '/temp'),
+            ('/var/log//app/', '/var/log/app/'),
+            ('//node/share', '//node/share'),
+            ('//node/share/temp/../new', '//node/share/new'),
+            )
+        for initial, result in test_data:
+            for conv in (unicode, lambda s: s.encode('ascii')):
+                normal = Path(conv(initial)).normpath()
+                self.assertEqual(normal, Path(conv(result)), "%r.normpath() (%r) != %r" % (initial, normal, result))
+                self.assertEqual(normal._split(), Path(conv(result))._split())
+        self.assertRaises(ValueError, Path('/temp/../..').normpath)
+        self.assertEqual(
+                Path.normpaths(['/temp/./this', unicode('a/../b'), '/x//y/'.encode('ascii')]),
+                [Path('/temp/this'), Path(unicode('b')), Path('/x/y/'.encode('ascii'))],
+                )
+        self.assertEqual(Path.normpath('x/../y'), Path('y'))
+
     if os.path.__name__ == 'ntpath':
         def test_nt_multiplication(self):
             "check path fusing"
@@ -514,6 +643,49 @@ class TestPathBasics(TestCase):
             self.assertEqual(b_huh._base, b_base_name, i)
             self.assertEqual(b_huh._ext, b_ext, i)
 
+    def test_division_chain(self):
+        "check components of joined paths"
+        tests = (
+                (('//machine/share', 'temp', 'file.txt'), '//machine/share/temp/file.txt', '//machine/share', '/temp', 'file.txt', '.txt'),
+                (('//machine/share/', 'file.txt'), '//machine/share/file.txt', '//machine/share', '/', 'file.txt', '.txt'),
+                (('', 'temp'), '/temp', '', '/', 'temp', ''),
+                (('/', '/temp/', 'place/'), '/temp/place/', '', '/temp/place', '', ''),
+                (('temp//place', '..', 'file.'), 'temp//place/../file.', '', 'temp/place/..', 'file.', '.'),
+                (('temp', './'), 'temp/./', '', 'temp/.', '', ''),
+                )
+        for parts, value, vol, dirs, filename, ext in tests:
+            for convert in (unicode, lambda s: s.encode('ascii')):
+                p = Path(convert(parts[0]))
+                for part in parts[1:]:
+                    p = p / convert(part)
+                self.assertEqual(p, convert(value))
+                self.assertEqual(p.vol, convert(vol))
+                self.assertEqual(p.dirs, convert(dirs))
+                self.assertEqual(p.filename, convert(filename))
+                self.assertEqual(p.ext, convert(ext))
+
+    def test_joinpath(self):
+        "check multi-part joins"
+        tests = (
+                (('/temp', 'place', 'file.txt'), '/temp/place/file.txt'),
+                (('/temp/', '/place/', '/file.txt'), '/temp/place/file.txt'),
+                (('temp', '', '/', 'place/'), 'temp/place/'),
+                (('temp', 'place', ''), 'temp/place/'),
+                (('', 'temp'), '/temp'),
+                (('//machine/share', 'temp', 'file.txt'), '//machine/share/temp/file.txt'),
+                (('temp', ), 'temp'),
+                )
+        for parts, expected in tests:
+            chained = Path(parts[0])
+            for part in parts[1:]:
+                chained /= part
+            self.assertEqual(Path(parts[0]).joinpath(*parts[1:]), expected)
+            self.assertEqual(Path.joinpath(*parts), expected)
+            self.assertEqual(chained, expected)
+            self.assertEqual(Path(parts[0]).joinpath(*parts[1:]).filename, chained.filename)
+        self.assertRaises(ValueError, Path('/temp').joinpath, 'place', '//machine/share/')
+        self.assertRaises(TypeError, Path('/temp').joinpath, 'place', 7)
+
     def test_subtraction(self):
         "check path subtraction"
         self.assertEqual(Path('/temp') - Path('/temp'), Path(''))
@@ -799,6 +971,18 @@ class TestPathFileOperations(TestCase):
             self.assertEqual(path, target)
             self.assertTrue(isinstance(path, Path))
 
+    def test_ascend_components(self):
+        for path, target in zip(
+                Path(b'/usr/home/ethan/.bashrc').ascend(),
+                (b'/usr/home/ethan/.bashrc', b'/usr/home/ethan', b'/usr/home', b'/usr', b'/'),
+                ):
+            self.assertEqual(path, target)
+            self.assertEqual(path.filename, Path(target).filename)
+            self.assertEqual(path.dirs, Path(target).dirs)
+            self.assertEqual(path.ext, Path(target).ext)
+        self.assertEqual(list(Path('usr/home/ethan').ascend()), ['usr/home/ethan', 'usr/home'])
+        self.assertEqual(list(Path('//machine/share/temp').ascend()), ['//machine/share/temp', '//machine/share/', '//machine/share'])
+
     def test_chdir(self):
         current = os.getcwd()
         def verify(new_dir):
@@ -886,6 +1070,56 @@ class TestPathFileOperations(TestCase):
         Path(self.project).copy(['INSTALL', 'README'], test_5)
         verify_text(test_5)
 
+    def test_copy_engine(self):
+        copier = Path.copier
+        before = sum(copier.counts.values())
+        test_1 = os.path.join(tempdir, 'test_1')
+        os.mkdir(test_1)
+        Path.copy([self.project_audio_sound, self.project_install], test_1)
+        self.assertEqual(sum(copier.counts.values()), before + 2)
+        with open(os.path.join(test_1, 'sound.mp3'), 'rb') as fh:
+            self.assertEqual(fh.read(), self.sound)
+        copied, original = os.stat(os.path.join(test_1, 'INSTALL')), os.stat(self.project_install)
+        if hasattr(original, 'st_mtime_ns'):
+            self.assertEqual(copied.st_mtime_ns, original.st_mtime_ns)
+        else:
+            # copystat() goes through float seconds, which lose the last digits
+            self.assertAlmostEqual(copied.st_mtime, original.st_mtime, places=5)
+        self.assertRaises(Exception, copier.copyfile, self.project_install, self.project_install)
+        # each method in turn, as the earlier ones are found unsupported
+        # (not every file system has them all)
+        engine = copier.__class__()
+        target = os.path.join(test_1, 'copy.mp3')
+        open(target, 'w').close()
+        st = os.stat(self.project_audio_sound), os.stat(target)
+        for i, method in enumerate(engine.methods):
+            used = engine.copyfile(self.project_audio_sound, target)
+            self.assertTrue(engine.methods.index(used) >= i, '%s used after %s' % (used, engine.methods[:i]))
+            with open(target, 'rb') as fh:
+                self.assertEqual(fh.read(), self.sound)
+            engine._unsupported.add((method, st[0].st_dev, st[1].st_dev))
+        self.assertEqual(used, engine.methods[-1])
+        self.assertEqual(sum(engine.counts.values()), len(engine.methods))
+        if 'copy_file_range' in engine.methods:
+            # a method that fails before copying anything is given up on
+            engine = copier.__class__()
+            if 'clone' in engine.methods:
+                engine._unsupported.add(('clone', st[0].st_dev, st[1].st_dev))
+            copy_file_range = os.copy_file_range
+            def not_here(*args):
+                raise OSError(errno.EXDEV, 'cross-device')
+            os.copy_file_range = not_here
+            try:
+                self.assertEqual(
+                        engine.copyfile(self.project_audio_sound, target),
+                        engine.methods[engine.methods.index('copy_file_range') + 1],
+                        )
+            finally:
+                os.copy_file_range = copy_file_range
+            self.assertTrue(('copy_file_range', st[0].st_dev, st[1].st_dev) in engine._unsupported)
+            with open(target, 'rb') as fh:
+                self.assertEqual(fh.read(), self.sound)
+
     def test_copytree(self):
         def verify_copy(new_dir):
             for entry in self.project_dirs:
@@ -910,6 +1144,44 @@ class TestPathFileOperations(TestCase):
         Path.copytree(self.project, os.path.join(tempdir, 'test_2'))
         verify_copy('test_2')
 
+    if py_ver >= (3, 2):
+
+        def test_copytree_workers(self):
+            source = Path(self.project)
+            result = source.copytree(os.path.join(tempdir, 'test_1'), workers=4)
+            self.assertTrue(result)
+            self.assertEqual(result.operation, 'copytree')
+            self.assertEqual(len(result.succeeded), len(self.project_files))
+            self.assertTrue(result.rate > 0)
+            for entry in self.project_dirs + self.project_files:
+                self.assertTrue(os.path.exists(os.path.join(tempdir, 'test_1', entry)))
+            with open(os.path.join(tempdir, 'test_1', 'audio', 'sound.mp3'), 'rb') as fh:
+                self.assertEqual(fh.read(), self.sound)
+            # the top directory still has to be new, unless dirs_exist_ok
+            self.assertRaises(OSError, source.copytree, os.path.join(tempdir, 'test_1'), workers=4)
+            if py_ver >= (3, 8):
+                result = Path.copytree(
+                        self.project, os.path.join(tempdir, 'test_1'),
+                        ignore=shutil.ignore_patterns('*.png', 'app'),
+                        dirs_exist_ok=True, workers=2,
+                        )
+                self.assertEqual(len(result.succeeded), len(self.project_files) - 2)
+            if not is_win:
+                os.symlink(self.project_readme, os.path.join(self.project, 'readme_link'))
+                os.symlink(os.path.join(self.project, 'gone'), os.path.join(self.project, 'dangling'))
+                result = source.copytree(os.path.join(tempdir, 'test_2'), symlinks=True, workers=2)
+                self.assertTrue(result)
+                self.assertTrue(os.path.islink(os.path.join(tempdir, 'test_2', 'readme_link')))
+                result = source.copytree(os.path.join(tempdir, 'test_3'), ignore_dangling_symlinks=True, workers=2)
+                self.assertTrue(result)
+                self.assertFalse(os.path.islink(os.path.join(tempdir, 'test_3', 'readme_link')))
+                self.assertFalse(os.path.lexists(os.path.join(tempdir, 'test_3', 'dangling')))
+                # errors are collected, not raised
+                result = source.copytree(os.path.join(tempdir, 'test_4'), workers=2)
+                self.assertFalse(result)
+                self.assertEqual([p for p, e in result.failed], [os.path.join(self.project, 'dangling')])
+                self.assertTrue(os.path.exists(os.path.join(tempdir, 'test_4', 'INSTALL')))
+
     def test_descend(self):
         for path, target in zip(
                 Path('/usr/home/ethan/source/antipathy/').descend(),
@@ -924,6 +1196,17 @@ class TestPathFileOperations(TestCase):
             self.assertEqual(path, target)
             self.assertTrue(isinstance(path, Path))
 
+    def test_descend_components(self):
+        for path, target in zip(
+                Path('../home//ethan/./source.tar.gz').descend(),
+                ('..', '../home', '../home/ethan', '../home/ethan/.', '../home/ethan/./source.tar.gz'),
+                ):
+            self.assertEqual(path, target)
+            self.assertEqual(path.filename, Path(target).filename)
+            self.assertEqual(path.dirs, Path(target).dirs)
+            self.assertEqual(path.ext, Path(target).ext)
+        self.assertEqual(list(Path('').descend()), [])
+
     def test_exists(self):
         self.assertTrue(Path.exists(self.project_audio))
         self.assertFalse(Path.exists(os.path.join(tempdir, 'lala')))
@@ -961,6 +1244,156 @@ class TestPathFileOperations(TestCase):
                 seeking,
                 )
 
+    if hasattr(os, 'scandir'):
+        def test_iglob(self):
+            def verify(found, seeking):
+                found = list(found)
+                self.assertEqual(len(found), len(seeking), found)
+                self.assertEqual(set(found), set(os.path.join(tempdir, s) for s in seeking))
+            verify(Path.iglob(os.path.join(tempdir, 'project', '*')), ['project/' + n for n in ['INSTALL', 'README', 'audio', 'graphics', 'app']])
+            verify(Path(self.project).iglob('*/'), ['project/audio/', 'project/graphics/', 'project/app/'])
+            verify(Path(tempdir).iglob('**'), ['project'] + self.files[1:] + self.dirs[1:] + [tempdir])
+            verify(Path(tempdir).iglob('**/*.*'), ['project/audio/sound.mp3', 'project/graphics/background.png'])
+            verify(Path(tempdir).iglob('project/**/L*'), ['project/app/LICENSE'])
+            verify(Path(tempdir).iglob('.*'), ['.sh'])
+            verify(Path(tempdir).iglob('*'), ['project'])
+            verify(Path(tempdir).iglob('project/README'), ['project/README'])
+            verify(Path(tempdir).iglob('project/missing/*'), [])
+            os.symlink(self.project, os.path.join(tempdir, 'link'))
+            verify(Path(tempdir).iglob('link/*/L*'), ['link/app/LICENSE'])
+            verify(Path(tempdir).iglob('**/LICENSE'), ['project/app/LICENSE'])
+
+        def test_glob_pattern(self):
+            pattern = GlobPattern('*/*.*')
+            self.assertEqual(repr(pattern), "GlobPattern('*/*.*')")
+            self.assertEqual(pattern.glob(self.project_app), [])
+            self.assertEqual(
+                    set(pattern.glob(self.project)),
+                    set([self.project_audio_sound, self.project_graphics_background]),
+                    )
+            self.assertEqual(list(pattern.iglob(self.project_graphics)), [])
+            self.assertEqual(GlobPattern(self.project_readme).glob('/elsewhere'), [self.project_readme])
+            found = GlobPattern('**/*.png'.encode('ascii')).glob(self.project.encode('ascii'))
+            self.assertEqual(found, [Path(self.project_graphics_background.encode('ascii'))])
+            self.assertTrue(isinstance(found[0], Path))
+
+        def test_glob_many(self):
+            pattern = GlobPattern('*/L*', '*/*.*', 'INSTALL', '*/*', 'missing')
+            self.assertEqual(
+                    repr(pattern),
+                    "GlobPattern('*/L*', '*/*.*', 'INSTALL', '*/*', 'missing')",
+                    )
+            found = pattern.glob(self.project)
+            self.assertEqual(found[0], self.project_app_license)
+            self.assertEqual(
+                    set(found[1:3]),
+                    set([self.project_audio_sound, self.project_graphics_background]),
+                    )
+            self.assertEqual(found[3:], [self.project_install])
+            self.assertEqual(set(pattern.iglob(self.project)), set(found))
+            self.assertRaises(TypeError, GlobPattern)
+            self.assertRaises(TypeError, GlobPattern, '*', '*'.encode('ascii'))
+            # bulk operations match a list of patterns in one pass, each file once
+            Path(self.project).unlink(['*/*.*', 'README', '*/sound.mp3', 'R*'])
+            for name in (self.project_audio_sound, self.project_graphics_background, self.project_readme):
+                self.assertFalse(os.path.exists(name))
+            self.assertTrue(os.path.exists(self.project_install))
+            Path.unlink([os.path.join(self.project, '*/L*'), self.project_install])
+            self.assertFalse(os.path.exists(self.project_app_license))
+            self.assertFalse(os.path.exists(self.project_install))
+            # plain names that do not exist are still an error
+            self.assertRaises(OSError, Path.unlink, [self.project_install])
+
+        def test_glob_braces(self):
+            project = Path(self.project)
+            self.assertEqual(
+                    set(project.glob('{audio,graphics}/*.{mp3,png}')),
+                    set([self.project_audio_sound, self.project_graphics_background]),
+                    )
+            self.assertEqual(
+                    set(project.glob('{app/L*,{READ,INST}*}')),
+                    set([self.project_app_license, self.project_readme, self.project_install]),
+                    )
+            self.assertEqual(project.glob('{.,app}/LICENSE'), [self.project_app_license])
+            self.assertEqual(project.glob('{READ}*'), [])
+            open(os.path.join(self.project, '{READ}ME'), 'w').close()
+            self.assertEqual(project.glob('{READ}*'), [os.path.join(self.project, '{READ}ME')])
+            self.assertEqual(Path(self.project_app).glob('{L,M}*'), [self.project_app_license])
+            self.assertEqual(
+                    Path.glob(os.path.join(self.project, 'app', '{L,M}*').encode('ascii')),
+                    [self.project_app_license.encode('ascii')],
+                    )
+            # one matcher per segment: the project directory is listed once
+            listed = []
+            scandir = os.scandir
+            def counting_scandir(path='.'):
+                listed.append(path)
+                return scandir(path)
+            os.scandir = counting_scandir
+            try:
+                found = project.glob('{I,R}*{L,E}')
+            finally:
+                os.scandir = scandir
+            self.assertEqual(set(found), set([self.project_install, self.project_readme]))
+            self.assertEqual(len(listed), 1)
+
+    def test_stat_cache(self):
+        stats = Path.stats
+        self.assertEqual(stats.size, 0)
+        news = Path(self.project) / 'NEWS'
+        with stats.enabled(64, ttl=None) as cache:
+            self.assertTrue(cache is stats)
+            cache.clear()
+            self.assertFalse(news.exists())
+            self.assertRaises(OSError, news.stat)
+            self.assertRaises(OSError, Path.lstat, news)
+            self.assertEqual((cache.hits, cache.misses), (2, 1))
+            # Path's own changes are seen at once ...
+            news.touch()
+            self.assertTrue(news.exists())
+            self.assertTrue(news.isfile())
+            self.assertFalse(news.isdir())
+            self.assertEqual(news.stat(), os.stat(news))
+            self.assertEqual(news.lstat(), news.stat())
+            self.assertEqual((cache.hits, cache.misses), (7, 2))
+            Path(self.project).mkdir('docs')
+            self.assertTrue(Path.isdir(os.path.join(self.project, 'docs')))
+            news.move(os.path.join(self.project, 'docs'))
+            self.assertFalse(news.exists())
+            self.assertTrue(Path(self.project).isfile('docs/NEWS'))
+            Path(self.project).rmtree('docs')
+            self.assertFalse(Path(self.project).exists('docs/NEWS'))
+            # ... others only once discarded
+            changes = os.path.join(self.project, 'CHANGES')
+            open(changes, 'w').close()
+            self.assertTrue(Path(self.project).lexists('CHANGES'))
+            os.unlink(changes)
+            self.assertTrue(Path(self.project).lexists('CHANGES'))
+            cache.discard(changes)
+            self.assertFalse(Path(self.project).lexists('CHANGES'))
+            cache.ttl = 0
+            open(news, 'w').close()
+            self.assertTrue(news.exists())
+            if not is_win:
+                link = Path(self.project) / 'news_link'
+                os.symlink(news, link)
+                self.assertTrue(link.islink())
+                self.assertTrue(link.isfile())
+                self.assertEqual(link.stat(), news.stat())
+                self.assertNotEqual(link.lstat(), news.stat())
+            # 'x' and 'x/' are one entry, and 'x/' is only ever a directory
+            cache.ttl = None
+            slashed = Path(self.project) / 'docs/'
+            self.assertFalse(slashed.exists())
+            Path(self.project).mkdir('docs')
+            self.assertTrue(slashed.exists())
+            self.assertTrue(slashed.isdir())
+            self.assertTrue(Path(news).exists())
+            self.assertFalse(Path(news + '/').exists())
+            self.assertRaises(OSError, Path.stat, news + '/')
+        self.assertEqual((stats.size, len(stats)), (0, 0))
+        self.assertRaises(ValueError, stats.resize, -1)
+
     def test_isdir(self):
         self.assertTrue(Path.isdir(self.project))
         self.assertFalse(Path(self.sh_file).isdir())
@@ -1046,6 +1479,105 @@ class TestPathFileOperations(TestCase):
         self.assertEqual(Path(self.project).listdir(), contents)
         self.assertEqual(Path(tempdir).listdir('project'), contents)
 
+    if hasattr(os, 'scandir'):
+        def test_iterdir(self):
+            contents = sorted(os.path.join(self.project, p) for p in os.listdir(self.project))
+            self.assertEqual(sorted(Path.iterdir(self.project)), contents)
+            self.assertEqual(sorted(Path(self.project).iterdir()), contents)
+            self.assertEqual(sorted(Path(tempdir).iterdir('project')), contents)
+            self.assertEqual(
+                    sorted(Path(self.project).iterdir(kind='dir')),
+                    [self.project_app, self.project_audio, self.project_graphics],
+                    )
+            self.assertEqual(
+                    sorted(Path(self.project).iterdir(kind='file')),
+                    [self.project_install, self.project_readme],
+                    )
+            self.assertEqual(list(Path(self.project).iterdir(kind='link')), [])
+            self.assertEqual(
+                    list(Path(self.project).iterdir(kind=lambda e: e.name.startswith('R'))),
+                    [self.project_readme],
+                    )
+            self.assertRaises(ValueError, Path(self.project).iterdir, kind='fifo')
+            self.assertRaises(ValueError, Path.iterdir, self.project, kind='fifo')
+            for p in Path(self.project).iterdir():
+                self.assertEqual(p.isdir(), os.path.isdir(p))
+            cwd = os.getcwd()
+            try:
+                os.chdir(self.project)
+                self.assertEqual(sorted(Path.iterdir()), sorted(os.listdir('.')))
+            finally:
+                os.chdir(cwd)
+            if os.path.isdir('/proc/self/fd'):
+                open_fds = len(os.listdir('/proc/self/fd'))
+                entries = Path(self.project).iterdir()
+                next(entries)
+                self.assertEqual(len(os.listdir('/proc/self/fd')), open_fds + 1)
+                entries.close()
+                self.assertEqual(len(os.listdir('/proc/self/fd')), open_fds)
+
+        def test_listing_cache(self):
+            listings = Path.listings
+            self.assertEqual(listings.size, 0)
+            # a directory changed in the last couple of seconds is not cached
+            old = time.time() - 60
+            os.utime(self.project, (old, old))
+            with listings.enabled(4) as cache:
+                self.assertTrue(cache is listings)
+                cache.clear()
+                contents = sorted(Path(self.project).listdir())
+                self.assertEqual((cache.hits, cache.misses, len(cache)), (0, 1, 1))
+                self.assertEqual(sorted(Path.listdir(self.project)), contents)
+                self.assertEqual(sorted(Path(self.project).glob('*')), sorted(Path(self.project)/c for c in contents))
+                self.assertEqual(sorted(Path(self.project).iterdir()), sorted(Path(self.project)/c for c in contents))
+                self.assertEqual((cache.hits, cache.misses), (3, 1))
+                # a change to the directory is seen at once
+                Path(self.project).touch('NEWS')
+                self.assertEqual(sorted(Path(self.project).listdir()), sorted(contents + ['NEWS']))
+                self.assertEqual((cache.hits, cache.misses, len(cache)), (3, 2, 0))
+                os.utime(self.project, (old, old))
+                Path(self.project).listdir()
+                cache.ttl = 0
+                Path(self.project).listdir()
+                self.assertEqual((cache.hits, cache.misses), (3, 4))
+                cache.ttl = None
+                Path(self.project).listdir()
+                cache.discard(self.project)
+                Path(self.project).listdir()
+                self.assertEqual((cache.hits, cache.misses), (4, 5))
+                self.assertRaises(OSError, Path.listdir, os.path.join(self.project, 'missing'))
+                # a listing read through a relative name is still good after a chdir()
+                os.utime(self.project_audio, (old, old))
+                current = os.getcwd()
+                os.chdir(self.project)
+                try:
+                    list(Path('audio').iterdir())
+                    os.chdir(tempdir)
+                    hits = cache.hits
+                    found = list(Path('project/audio').iterdir())
+                    self.assertEqual(cache.hits, hits + 1)
+                    self.assertEqual([f.stat() for f in found], [os.stat(f) for f in found])
+                finally:
+                    os.chdir(current)
+                # writing to a file leaves its directory's mtime alone, so
+                # its stat() is not kept with the listing
+                grown = os.path.join(self.project_audio, 'grown')
+                with open(grown, 'wb') as f:
+                    f.write(b'12')
+                os.utime(self.project_audio, (old - 60, old - 60))
+                def size():
+                    for p in Path(self.project_audio).iterdir():
+                        if p.endswith('grown'):
+                            return p.stat().st_size, p.lstat().st_size
+                self.assertEqual(size(), (2, 2))
+                with open(grown, 'ab') as f:
+                    f.write(b'x' * 1000)
+                hits = cache.hits
+                self.assertEqual(size(), (1002, 1002))
+                self.assertEqual(cache.hits, hits + 1)
+            self.assertEqual((listings.size, len(listings)), (0, 0))
+            self.assertRaises(ValueError, listings.resize, -1)
+
     if hasattr(os, 'lstat') and hasattr(os, 'symlink'):
 
         def test_lstat(self):
@@ -1087,6 +1619,41 @@ class TestPathFileOperations(TestCase):
         self.assertTrue(Path('test_4').exists())
         os.chdir(current)
 
+    def test_makedirs_batch(self):
+        os.makedirs(os.path.join(tempdir, 'test_1', 'psyche_1'))
+        base = Path(tempdir) / 'test_1'
+        targets = [base/'psyche_%d' % (i % 2)/'mirage_%d' % i for i in range(4)]
+        targets.append(base/'psyche_1')
+        known = set()
+        made = Path.makedirs(targets, known=known)
+        self.assertEqual(made, [
+                base/'psyche_0', base/'psyche_0/mirage_0', base/'psyche_0/mirage_2',
+                base/'psyche_1/mirage_1', base/'psyche_1/mirage_3',
+                ])
+        for target in targets:
+            self.assertTrue(os.path.isdir(target))
+        self.assertEqual(Path.makedirs(targets, known=known), [])
+        # known is trusted until a new directory below proves it wrong
+        os.rmdir(base/'psyche_0/mirage_2')
+        os.rmdir(base/'psyche_0/mirage_0')
+        os.rmdir(base/'psyche_0')
+        self.assertEqual(Path.makedirs(targets, known=known), [])
+        self.assertFalse(os.path.exists(base/'psyche_0'))
+        self.assertEqual(Path.makedirs([base/'psyche_0/mirage_4'], known=known), [base/'psyche_0', base/'psyche_0/mirage_4'])
+        known.discard(base/'psyche_0/mirage_2')
+        self.assertEqual(Path.makedirs(targets, known=known), [base/'psyche_0/mirage_2'])
+        open(base/'psyche_1/mirage_1/file', 'w').close()
+        self.assertRaises(OSError, Path.makedirs, [base/'psyche_1/mirage_1/file/deeper'])
+        # a file in the way is not taken for a directory
+        open(base/'afile', 'w').close()
+        self.assertEqual(Path.makedirs([base/'afile', base/'psyche_1/mirage_6'], known=known), [base/'psyche_1/mirage_6'])
+        self.assertFalse(base/'afile' in known)
+        self.assertEqual(Path.makedirs(base/'afile', known=known), [])
+        self.assertFalse(base/'afile' in known)
+        # a single directory uses known too
+        self.assertEqual(Path.makedirs(base/'psyche_2/mirage_5', known=known), [base/'psyche_2', base/'psyche_2/mirage_5'])
+        self.assertTrue(base/'psyche_2/mirage_5' in known)
+
     def test_move(self):
         Path.move(self.sh_file, os.path.join(tempdir, 'non-sh'))
         self.assertTrue(os.path.exists(os.path.join(tempdir, 'non-sh')))
@@ -1095,6 +1662,43 @@ class TestPathFileOperations(TestCase):
         Path(os.path.join(tempdir, 'ultra-sh')).move(os.path.join(tempdir, '.sh'))
         self.assertTrue(os.path.exists(os.path.join(tempdir, '.sh')))
 
+    def test_move_workers(self):
+        dest = os.path.join(tempdir, 'dest')
+        os.mkdir(dest)
+        open(os.path.join(dest, 'README'), 'w').close()
+        sources = [self.project_audio_sound, self.project_graphics, self.project_readme]
+        result = Path.move(sources, dest, workers=2)
+        self.assertEqual(result.operation, 'move')
+        self.assertEqual(result.succeeded, sources[:2])
+        self.assertEqual([p for p, e in result.failed], [self.project_readme])
+        self.assertTrue(isinstance(result.failed[0][1], shutil.Error))
+        self.assertTrue(os.path.exists(os.path.join(dest, 'sound.mp3')))
+        self.assertTrue(os.path.isdir(os.path.join(dest, 'graphics')))
+        self.assertFalse(os.path.exists(self.project_graphics))
+        self.assertRaises(OSError, Path.move, [self.project_readme, self.project_install], self.sh_file, workers=2)
+        # a single source may go to a new name
+        result = Path(self.project_readme).move(os.path.join(tempdir, 'moved'), workers=2)
+        self.assertTrue(result)
+        self.assertTrue(os.path.exists(os.path.join(tempdir, 'moved')))
+        # and sources on other devices are copied, then removed
+        if os.path.isdir('/dev/shm') and os.stat('/dev/shm').st_dev != os.stat(tempdir).st_dev:
+            elsewhere = tempfile.mkdtemp(dir='/dev/shm')
+            try:
+                os.makedirs(os.path.join(elsewhere, 'tree', 'branch'))
+                with open(os.path.join(elsewhere, 'tree', 'branch', 'leaf'), 'w') as f:
+                    f.write('leaf')
+                with open(os.path.join(elsewhere, 'file'), 'w') as f:
+                    f.write('file')
+                os.symlink('file', os.path.join(elsewhere, 'link'))
+                result = Path(elsewhere).move(['tree', 'file', 'link'], dest, workers=2)
+                self.assertEqual(len(result.succeeded), 3)
+                self.assertEqual(os.listdir(elsewhere), [])
+                with open(os.path.join(dest, 'tree', 'branch', 'leaf')) as f:
+                    self.assertEqual(f.read(), 'leaf')
+                self.assertEqual(os.readlink(os.path.join(dest, 'link')), 'file')
+            finally:
+                shutil.rmtree(elsewhere)
+
     def test_open(self):
         fh = Path.open(self.sh_file)
         data = fh.read()
@@ -1208,6 +1812,107 @@ class TestPathFileOperations(TestCase):
         Path(tempdir).rmtree('test_1')
         self.assertFalse(os.path.exists(os.path.join(tempdir, 'test_1')))
 
+    def test_rmtree_workers(self):
+        top = os.path.join(tempdir, 'test_1')
+        for i in range(5):
+            os.makedirs(os.path.join(top, 'part_%d' % i, 'deeper'))
+            for j in range(300):
+                open(os.path.join(top, 'part_%d' % i, 'file_%d' % j), 'w').close()
+            open(os.path.join(top, 'part_%d' % i, 'deeper', 'leaf'), 'w').close()
+        if not is_win:
+            os.symlink(self.project, os.path.join(top, 'part_0', 'elsewhere'))
+        Path.rmtree(top, workers=4)
+        self.assertFalse(os.path.exists(top))
+        self.assertTrue(os.path.exists(self.project_readme))
+        self.assertRaises(ValueError, Path(top).rmtree, workers=0)
+        self.assertRaises(OSError, Path(top).rmtree, workers=4)
+        errors = []
+        Path(top).rmtree(onerror=lambda *args: errors.append(args[:2]), workers=4)
+        if rmtree_by_fd:
+            self.assertEqual(errors, [(os.lstat, top)])
+        else:
+            # shutil.rmtree reports it its own way
+            self.assertTrue(errors)
+            self.assertEqual(set(path for func, path in errors), set([top]))
+        Path(top).rmtree(ignore_errors=True, workers=4)
+        if not is_win:
+            os.symlink(self.project, top)
+            errors = []
+            Path.rmtree(top, onerror=lambda *args: errors.append(args[:2]), workers=4)
+            self.assertEqual(errors, [(os.path.islink, top)])
+            self.assertTrue(os.path.exists(self.project_readme))
+            os.unlink(top)
+
+    if rmtree_by_fd and resource is not None and os.path.isdir('/proc/self/fd'):
+
+        def test_rmtree_workers_deep(self):
+            # descriptors held open grow with the depth, not with the siblings
+            top = os.path.join(tempdir, 'test_1')
+            dir = top
+            for level in range(30):
+                for i in range(40):
+                    os.makedirs(os.path.join(dir, 'sub_%d' % i))
+                # the branch that goes on is the last one read
+                last = os.listdir(dir)[-1]
+                open(os.path.join(dir, 'file'), 'w').close()
+                dir = os.path.join(dir, last)
+            in_use = len(os.listdir('/proc/self/fd'))
+            soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+            resource.setrlimit(resource.RLIMIT_NOFILE, (in_use + 96, hard))
+            try:
+                Path(top).rmtree(workers=4)
+            finally:
+                resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+            self.assertFalse(os.path.exists(top))
+            # and the walk does not recurse
+            os.makedirs(os.path.join(top, *['d'] * 300))
+            limit = sys.getrecursionlimit()
+            sys.setrecursionlimit(len(inspect.stack()) + 100)
+            try:
+                Path(top).rmtree(workers=4)
+            finally:
+                sys.setrecursionlimit(limit)
+            self.assertFalse(os.path.exists(top))
+
+    def test_rmtree_defer(self):
+        self.assertRaises(ValueError, Path.trash.__class__().defer, self.project, True)
+        trash = os.path.join(tempdir, 'trash')
+        os.makedirs(os.path.join(trash, '123-4567-1', 'inside'))
+        open(os.path.join(trash, '123-4567-2'), 'w').close()
+        # a directory holding anything else is not taken for trash
+        open(os.path.join(trash, 'precious'), 'w').close()
+        self.assertRaises(OSError, Path.trash.use, trash)
+        self.assertTrue(Path.trash.wait(5))
+        self.assertEqual(sorted(os.listdir(trash)), ['123-4567-1', '123-4567-2', 'precious'])
+        os.unlink(os.path.join(trash, 'precious'))
+        recovered, deleted = Path.trash.recovered, Path.trash.deleted
+        Path.trash.use(trash)
+        self.assertEqual(Path.trash.recovered, recovered + 2)
+        top = os.path.join(tempdir, 'test_1')
+        os.makedirs(os.path.join(top, 'mirage_2', 'empty_3'))
+        Path(top).rmtree(defer=True)
+        self.assertFalse(os.path.exists(top))
+        Path.unlink(self.project_readme, defer=True)
+        self.assertFalse(os.path.exists(self.project_readme))
+        self.assertTrue(Path.trash.wait(5))
+        self.assertEqual(os.listdir(trash), [])
+        self.assertEqual(Path.trash.deleted, deleted + 4)
+        self.assertEqual(Path.trash.pending, 0)
+        self.assertTrue(Path.trash.peak >= 1)
+        # what cannot be moved is handled as before
+        self.assertRaises(OSError, Path(top).rmtree, defer=True)
+        self.assertRaises(OSError, Path(self.project_readme).unlink, defer=True)
+        self.assertRaises(OSError, Path(self.project).unlink, defer=True)
+        self.assertTrue(os.path.exists(self.project))
+        # a trash directory that is removed is not made again
+        os.rmdir(trash)
+        for i in range(2):
+            os.makedirs(os.path.join(top, 'mirage_4'))
+            Path(top).rmtree(defer=True)
+            self.assertFalse(os.path.exists(top))
+            self.assertFalse(os.path.exists(trash))
+        Path.trash.use(trash)
+
     def test_stat(self):
         self.assertEqual(os.stat(self.sh_file), Path.stat(self.sh_file))
         self.assertEqual(os.stat(self.sh_file), Path(self.sh_file).stat())
@@ -1278,6 +1983,85 @@ class TestPathFileOperations(TestCase):
         Path(tempdir).unlink('.sh')
         self.assertFalse(os.path.exists(self.sh_file))
 
+    def test_unlink_workers(self):
+        missing = os.path.join(self.project, 'missing')
+        files = [self.project_audio_sound, missing, self.project_readme, self.project_install]
+        result = Path.unlink(files, workers=3)
+        self.assertFalse(result)
+        self.assertEqual(result.operation, 'unlink')
+        self.assertEqual(result.succeeded, [self.project_audio_sound, self.project_readme, self.project_install])
+        self.assertEqual([p for p, e in result.failed], [missing])
+        self.assertTrue(isinstance(result.failed[0][1], OSError))
+        for name in (self.project_audio_sound, self.project_readme, self.project_install):
+            self.assertFalse(os.path.exists(name))
+        self.assertRaises(ValueError, Path.unlink, [self.project_app_license], workers=0)
+        # without workers the first error still stops everything
+        self.assertRaises(OSError, Path.unlink, [missing, self.project_app_license])
+        self.assertTrue(os.path.exists(self.project_app_license))
+
+    def test_touch_workers(self):
+        names = [os.path.join(self.project, 'marker_%d' % i) for i in range(20)]
+        result = Path.touch(names, workers=4)
+        self.assertTrue(result)
+        self.assertEqual(len(result.succeeded), 20)
+        for name in names:
+            self.assertTrue(os.path.exists(name))
+        if ThreadPoolExecutor is not None:
+            target = time.mktime((2020, 5, 20, 4, 33, 17, -1, -1, -1))
+            with ThreadPoolExecutor(2) as pool:
+                result = Path.utime(names, (target, target), executor=pool)
+                self.assertEqual(result.succeeded, names)
+                result = Path.chmod(0o600, os.path.join(self.project, 'marker_*'), executor=pool)
+                self.assertEqual(len(result.succeeded), 20)
+            for name in names:
+                self.assertEqual(os.stat(name).st_mtime, target)
+                if not is_win:
+                    self.assertEqual(os.stat(name).st_mode & 0o777, 0o600)
+
+    def test_touch_unmatched(self):
+        # a single name that matches nothing is made as it is
+        current = os.getcwd()
+        os.chdir(self.project)
+        try:
+            Path.touch('q7')
+            self.assertTrue(os.path.exists('q7'))
+            result = Path.touch('z9', workers=2)
+            self.assertEqual(result.succeeded, ['z9'])
+            self.assertTrue(os.path.exists('z9'))
+            for name in ('q', '7', 'z', '9'):
+                self.assertFalse(os.path.exists(name))
+        finally:
+            os.chdir(current)
+
+    def test_touch_literal(self):
+        names = [os.path.join(self.project, 'marker_%d' % i) for i in range(10)]
+        names.append(self.project_graphics)
+        target = time.mktime((2020, 5, 20, 4, 33, 17, -1, -1, -1))
+        Path.touch(names, (target, target), literal=True)
+        for name in names:
+            self.assertEqual(os.stat(name).st_mtime, target)
+        self.assertTrue(os.path.isdir(self.project_graphics))
+        # each file keeps its own time for a None
+        os.utime(names[0], (target, target - 60))
+        later = target + 3600
+        Path.touch(names[:2], (later, None), literal=True)
+        self.assertEqual(os.stat(names[0]).st_mtime, target - 60)
+        self.assertEqual(os.stat(names[1]).st_mtime, target)
+        self.assertEqual(os.stat(names[1]).st_atime, later)
+        missing = os.path.join(self.project, 'missing_*')
+        Path.touch([missing], no_create=True, literal=True)
+        self.assertFalse(os.path.exists(missing))
+        result = Path.touch([missing, os.path.join(self.project, 'nowhere', 'marker')], literal=True, workers=2)
+        self.assertEqual(result.succeeded, [missing])
+        self.assertEqual(len(result.failed), 1)
+        self.assertTrue(os.path.exists(missing))
+        if not is_win:
+            # a FIFO without a reader is not waited on
+            fifo = os.path.join(self.project, 'fifo')
+            os.mkfifo(fifo)
+            Path.touch(fifo, (target, target), literal=True)
+            self.assertEqual(os.stat(fifo).st_mtime, target)
+
     @not_implemented
     def test_utime(self):
         pass
@@ -1295,6 +2079,52 @@ class TestPathFileOperations(TestCase):
                         )
                 )
 
+    if hasattr(os, 'scandir'):
+        def test_scan(self):
+            def names(walker):
+                return [
+                        (dirpath, sorted([d.filename for d in dirnames]), sorted([f.filename for f in filenames]))
+                        for dirpath, dirnames, filenames in walker
+                        ]
+            def native(walker):
+                return [
+                        (dirpath, sorted(dirnames), sorted(filenames))
+                        for dirpath, dirnames, filenames in walker
+                        ]
+            for topdown in (True, False):
+                self.assertEqual(
+                        names(Path(self.project).scan(topdown)),
+                        native(os.walk(self.project, topdown)),
+                        )
+            self.assertEqual(names(Path.scan(self.project)), native(os.walk(self.project)))
+            # entries answer from what scandir found
+            for dirpath, dirnames, filenames in Path(self.project).scan():
+                for d in dirnames:
+                    self.assertEqual(d, Path(os.path.join(dirpath, d.filename)))
+                    self.assertTrue(d.isdir())
+                    self.assertFalse(d.isfile())
+                    self.assertFalse(d.islink())
+                for f in filenames:
+                    self.assertTrue(f.isfile())
+                    self.assertEqual(f.stat().st_size, os.stat(f).st_size)
+                    self.assertEqual(f.inode(), os.stat(f).st_ino)
+            # pruning dirnames keeps scan() out of them
+            seen = []
+            for dirpath, dirnames, filenames in Path(self.project).scan():
+                seen.append(dirpath)
+                dirnames[:] = [d for d in dirnames if d.filename != 'audio']
+            self.assertEqual(len(seen), 3)
+            self.assertTrue(Path(self.project_audio) not in seen)
+            # answers are as of the scan; a new Path asks again
+            dirpath, dirnames, filenames = next(Path(self.project).scan())
+            readme = [f for f in filenames if f.filename == 'README'][0]
+            os.unlink(self.project_readme)
+            self.assertTrue(readme.isfile())
+            self.assertFalse(Path(self.project_readme).isfile())
+            errors = []
+            self.assertEqual(list(Path(self.project_readme).scan(onerror=errors.append)), [])
+            self.assertEqual(len(errors), 1)
+
 
 class TestOspath(TestCase):
 